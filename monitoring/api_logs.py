@@ -1,8 +1,10 @@
 import os
 import sys
-from fastapi import FastAPI, Request
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+import asyncio
+from typing import Dict, Tuple
+from fastapi import FastAPI, Query
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
@@ -10,35 +12,53 @@ sys.path.append(MAIN_DIR)
 print(MAIN_DIR)
 LOG_DIR = f"{MAIN_DIR}/logs"
 
-# Initialize FastAPI app
-app = FastAPI()
+# Only the last LOG_TAIL_BYTES of each log are returned unless a client asks for more
+LOG_TAIL_BYTES = 128 * 1024
+# Upper bound on the tail a client can ask for, so one request cannot read whole logs into memory
+LOG_TAIL_MAX_BYTES = 8 * 1024 * 1024
+
+# Initialize FastAPI app (JSON responses are encoded with orjson)
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Tail of each log file, keyed by file name and tagged with the (mtime, size, tail_bytes) it was read at
+_LOG_CACHE: Dict[str, Tuple[float, int, int, str]] = {}
+
+def read_log_tail(file_path: str, size: int, tail_bytes: int) -> str:
+    """Reads the last `tail_bytes` of a log file, dropping the partial first line if cut."""
+    with open(file_path, "rb") as file:
+        file.seek(max(0, size - tail_bytes))
+        data = file.read()
+    if size > tail_bytes:
+        data = data[data.find(b"\n") + 1:]
+    return data.decode("utf-8", "replace")
 
-# Set up templates
-templates = Jinja2Templates(directory= f"{MAIN_DIR}/monitoring/templates")
 # Function to read all logs
-def get_all_logs():
+def get_all_logs(tail_bytes: int = LOG_TAIL_BYTES):
     logs = {}
     if os.path.exists(LOG_DIR):
         for file_name in os.listdir(LOG_DIR):
             if file_name.endswith(".log"):
                 file_path = os.path.join(LOG_DIR, file_name)
-                with open(file_path, "r") as file:
-                    logs[file_name] = file.read()
+                st = os.stat(file_path)
+                key = (st.st_mtime, st.st_size, tail_bytes)
+                cached = _LOG_CACHE.get(file_name)
+                # Only re-read files that changed since the last request
+                if cached is None or cached[:3] != key:
+                    cached = (*key, read_log_tail(file_path, st.st_size, tail_bytes))
+                    _LOG_CACHE[file_name] = cached
+                logs[file_name] = cached[3]
     # Sort logs with "error.log" on top
     sorted_logs = dict(sorted(logs.items(), key=lambda x: (x[0] != "error.log", x[0])))
     return sorted_logs
 
 
-
-# Route to render the logs dashboard
-@app.get("/", response_class=HTMLResponse)
-async def display_logs(request: Request):
-    logs = get_all_logs()  # Read logs dynamically
-    return templates.TemplateResponse("index.html", {"request": request, "logs": logs})
-
-
 # API to get logs in JSON format
 @app.get("/api/logs")
-async def api_logs():
-    logs = get_all_logs()
+async def api_logs(tail: int = Query(LOG_TAIL_BYTES, ge=1, le=LOG_TAIL_MAX_BYTES, description="Bytes to return from the end of each log.")):
+    logs = await asyncio.to_thread(get_all_logs, tail)
     return logs
+
+
+# Serve the static logs dashboard at "/"; the page fetches /api/logs itself.
+# Mounted last so the API route above takes precedence.
+app.mount("/", StaticFiles(directory=f"{MAIN_DIR}/monitoring/static", html=True), name="dashboard")
@@ -8,7 +8,8 @@ def run_log_api():
 
 def run_chatbot_api():
     # Run FastAPI chatbot in a separate process using Uvicorn
-    subprocess.run(["uvicorn", "src.api.app:app", "--reload", "--port", "5000"])
+    # No --reload: the auto-reloader re-imports the app and reloads every model on each file change
+    subprocess.run(["uvicorn", "src.api.app:app", "--port", "5000", "--workers", "1", "--no-access-log"])
 
 if __name__ == "__main__":
     # Run APIs concurrently using separate processes
@@ -4,80 +4,110 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 import sys
 import time
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 # Add your project directory to sys.path
 # Get the absolute path to the directory one level above the current file's directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
 
+# Imported first: it sets the inference thread counts before torch and FAISS are loaded
+from pipeline import get_pipeline, CONFIGRATION
 from utils import chatbot_log, error_log
-from utils.ingest_query_database import IngestQueryDatabase
-from preprocess.combined_tables import CombinedTables
-from preprocess.apply_embedding_combined import EmbeddingForCombined
-from preprocess.faiss_index import FAISSIndex
-from models.embedding_model_all_miniLM_L6_v2 import EmbeddingLoader
-from models.huggneface_model_flanT5 import FlanT5Load
+from utils.paths import project_root
 from rag.retrieval import Retrieve
-from rag.respons_generation import GenerateResponse
-from config import Config
-
-
-# Load Models and Configurations
-FLANMODEL = FlanT5Load().load()
-EMBEDDINGMODEL = EmbeddingLoader().load()
-
-INGESTDATA = IngestQueryDatabase()
-COMBINEDCOLUMNS = CombinedTables()
-EMBEDDINGCOBINED = EmbeddingForCombined()
-FAISSINDEX = FAISSIndex()
-
-CONFIGRATION = Config(None)
-
-FAQsDF = INGESTDATA.ingest(db_path=CONFIGRATION.path_database, query=CONFIGRATION.FAQsQ)
-MENUITEMsDF = INGESTDATA.ingest(db_path=CONFIGRATION.path_database, query=CONFIGRATION.MENUITEMsQ)
-
-# Handle Duplicates
-FAQsDF = FAQsDF.drop_duplicates()
-MENUITEMsDF = MENUITEMsDF.drop_duplicates()
-
-# Combine Columns
-FAQsDF_c = COMBINEDCOLUMNS.combined(columns=CONFIGRATION.columns_faqs, df=FAQsDF)
-MENUITEMsDF_c = COMBINEDCOLUMNS.combined(columns=CONFIGRATION.columns_menuitems, df=MENUITEMsDF)
-
-# Generate Embeddings
-FAQs_E = EMBEDDINGCOBINED.embedded(embedding_model=EMBEDDINGMODEL, df=FAQsDF_c)
-MENUITEMs_E = EMBEDDINGCOBINED.embedded(embedding_model=EMBEDDINGMODEL, df=MENUITEMsDF_c)
-
-# Convert FAISS Index for FAQs & Menu Items
-FAQsIndex = FAISSINDEX.create_faiss_index(embedding_array=FAQs_E)
-MENUITEMsIndex = FAISSINDEX.create_faiss_index(embedding_array=MENUITEMs_E)
-
-def main(query: str) -> str:
-    # Retrieval
-    RETRIEVE = Retrieve().retrieve(query=query,
-                                   embedding_model=EMBEDDINGMODEL,
-                                   index_1=FAQsIndex,
-                                   index_2=MENUITEMsIndex,
-                                   df_index_1=FAQsDF_c,
-                                   df_index_2=MENUITEMsDF_c,
-                                   top_k=CONFIGRATION.top_k_results)
+from rag.batching import GenerationBatcher, RetrievalBatcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads the shared chatbot pipeline once per process and exposes it as `app.state.pipeline`.
+    """
+    app.state.pipeline = get_pipeline()
+
+    # Inference runs in worker threads; torch/ONNX Runtime/FAISS release the GIL in native code
+    executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="inference")
+    asyncio.get_running_loop().set_default_executor(executor)
+
+    # Concurrent requests share batched query encoding and FAISS searches
+    pipeline = app.state.pipeline
+    app.state.retriever = RetrievalBatcher(
+        retriever=Retrieve(embedding_model=pipeline.embedding,
+                           index_1=pipeline.faqs_index,
+                           index_2=pipeline.menu_index,
+                           df_index_1=pipeline.faqs_df,
+                           df_index_2=pipeline.menu_df,
+                           query_cache_size=CONFIGRATION.query_cache_size),
+        top_k=CONFIGRATION.top_k_results,
+        max_batch_size=CONFIGRATION.retrieval_max_batch_size,
+        max_wait_ms=CONFIGRATION.retrieval_batch_wait_ms)
+    app.state.retriever.start()
+
+    # Concurrent requests share batched FLAN-T5 generate calls
+    app.state.batcher = GenerationBatcher(
+        generate_model=app.state.pipeline.flan,
+        generation_kwargs=dict(max_length=CONFIGRATION.max_length,
+                               do_sample=CONFIGRATION.do_sample,
+                               temperature=CONFIGRATION.temperature,
+                               top_p=CONFIGRATION.top_p,
+                               top_k=CONFIGRATION.top_k,
+                               max_context_tokens=CONFIGRATION.max_context_tokens),
+        max_batch_size=CONFIGRATION.max_batch_size,
+        max_wait_ms=CONFIGRATION.batch_wait_ms)
+    app.state.batcher.start()
+
+    # Response cache (LRU keyed on normalized query text), guarded by a lock bound to this loop
+    app.state.response_cache = OrderedDict()
+    app.state.response_cache_lock = asyncio.Lock()
+    yield
+    await app.state.batcher.stop()
+    await app.state.retriever.stop()
+    executor.shutdown(wait=False)
+
+async def main(query: str) -> str:
+    # Retrieval and generation are each batched with concurrent requests
+    RETRIEVE = await app.state.retriever.submit(query)
 
     # Model Generative
-    RESPONSEs = GenerateResponse().generate(query=query,
-                                            retriever=RETRIEVE,
-                                            generate_model=FLANMODEL,
-                                            max_length=CONFIGRATION.max_length,
-                                            do_sample=CONFIGRATION.do_sample,
-                                            temperature=CONFIGRATION.temperature,
-                                            top_p=CONFIGRATION.top_p,
-                                            top_k=CONFIGRATION.top_k)
+    RESPONSEs = await app.state.batcher.submit(query, RETRIEVE)
     return RESPONSEs
 
+def normalize_query(query: str) -> str:
+    """Collapse case and whitespace so trivially different queries share a cache entry."""
+    return " ".join(query.lower().split())
+
+async def cached_main(query: str) -> str:
+    """
+    Returns the cached response for `query` if present, otherwise runs `main` and caches the result.
+    The least recently used entry is evicted once the cache exceeds `response_cache_size`.
+    """
+    response_cache = app.state.response_cache
+    key = normalize_query(query)
+    async with app.state.response_cache_lock:
+        if key in response_cache:
+            response_cache.move_to_end(key)
+            chatbot_log.info("Response cache hit.")
+            return response_cache[key]
+
+    # A failed query raises here and is not cached
+    response = await main(query)
+
+    async with app.state.response_cache_lock:
+        response_cache[key] = response
+        response_cache.move_to_end(key)
+        while len(response_cache) > CONFIGRATION.response_cache_size:
+            response_cache.popitem(last=False)
+    return response
+
 # FastAPI App
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Mount the static folder (assuming your static files are under 'static/')
-templates = Jinja2Templates(directory="/workspaces/Chatbot-Restaurant/src/api/templates")
+templates = Jinja2Templates(directory=str(project_root() / "src" / "api" / "templates"))
 
 @app.get("/", response_class=HTMLResponse)
 async def get_form(request: Request):
@@ -86,7 +116,7 @@ async def get_form(request: Request):
 @app.post("/chat", response_class=HTMLResponse)
 async def chat(request: Request, query: str = Form(...)):
     start_time = time.time()
-    response = main(query=query)
+    response = await cached_main(query=query)
     end_time = time.time()
 
     # Log chatbot interaction and time taken
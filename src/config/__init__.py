@@ -1,6 +1,8 @@
 import yaml
 import os
 import sys
+import functools
+import glob
 from typing import Dict, Any, Optional
 # Get the absolute path to the directory one level above the current file's directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -8,13 +10,22 @@ sys.path.append(MAIN_DIR)
 
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
+from utils.paths import project_root
 
+# Directory searched for a YAML file when no explicit configuration path is given
+CONFIG_DIR = str(project_root() / "configs")
+
+# libyaml's C loader when PyYAML was built with it, the pure-Python loader otherwise
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=1)
 def config_yaml_reader(file_path: Optional[str] = None) -> Dict[str, Any]:
     """
     Reads a YAML configuration file and returns its contents as a dictionary.
+    The parsed result is cached, so callers must treat it as read-only.
 
     Args:
-        file_path (str): Path to the YAML file.
+        file_path (Optional[str]): Path to the YAML file. Defaults to the first YAML file in `CONFIG_DIR`.
 
     Returns:
         Dict[str, Any]: Parsed content of the YAML file.
@@ -24,23 +35,19 @@ def config_yaml_reader(file_path: Optional[str] = None) -> Dict[str, Any]:
         yaml.YAMLError: If there is an error while parsing the YAML file.
     """
     try:
-        # If not, look for any YAML file in the specified directory
-        config_files = os.listdir("/workspaces/Chatbot-Restaurant/configs")
-        for con in config_files:
-            if con.endswith(".yaml"):
-                # Set the first YAML file found as the configuration file
-                file_path = os.path.join("/workspaces/Chatbot-Restaurant/configs", con)
-                pipeline_log.info(f"Using alternative configuration file: {file_path}")
-                break
-            else:
-                # If no YAML file is found, raise an error
-                error_msg = "No YAML configuration file found in the directory."
+        if file_path is None:
+            # No explicit path, use the first YAML file in the configuration directory
+            candidates = sorted(glob.glob(os.path.join(CONFIG_DIR, "*.yaml")))
+            if not candidates:
+                error_msg = f"No YAML configuration file found in {CONFIG_DIR}."
                 error_log.error(error_msg)
                 raise FileNotFoundError(error_msg)
+            file_path = candidates[0]
+            pipeline_log.info(f"Using configuration file: {file_path}")
 
         # Load the YAML file
         with open(file_path, 'r') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=YAML_LOADER)
             pipeline_log.info("Successfully loaded configuration from YAML file.")
             return config
     except FileNotFoundError as e:
@@ -92,10 +99,21 @@ class Config:
         self.columns_faqs = self.database["columns_faqs"]
         self.MENUITEMsQ = self.database["MENUITEMsQ"]
         self.columns_menuitems = self.database["columns_menuitems"]
+        self.cache_dir = self.database["cache_dir"]
         pipeline_log.info("Database configuration loaded successfully.")
 
+        # Embedding Model
+        self.embedding_backend = self.embedding_model["backend"]
+        self.embedding_onnx_file = self.embedding_model["onnx_file_name"]
+        self.embedding_batch_size = self.embedding_model["batch_size"]
+        pipeline_log.info("Embedding model configuration loaded successfully.")
+
         # Retrieval 
         self.top_k_results = self.retrieval["top_k_results"]
+        self.retrieval_max_batch_size = self.retrieval["max_batch_size"]
+        self.retrieval_batch_wait_ms = self.retrieval["batch_wait_ms"]
+        self.index_spec = self.retrieval["index_spec"]
+        self.query_cache_size = self.retrieval["query_cache_size"]
         pipeline_log.info("Retrieval configuration loaded successfully.")
 
         # Generative Model
@@ -104,11 +122,18 @@ class Config:
         self.temperature = self.generative_model["temperature"]
         self.top_k = self.generative_model["top_k"]
         self.top_p = self.generative_model["top_p"]
+        self.max_context_tokens = self.generative_model["max_context_tokens"]
+        self.ct2_model_dir = self.generative_model["ct2_model_dir"]
+        self.load_in_8bit = self.generative_model["load_in_8bit"]
+        self.torch_compile = self.generative_model["torch_compile"]
+        self.max_batch_size = self.generative_model["max_batch_size"]
+        self.batch_wait_ms = self.generative_model["batch_wait_ms"]
         pipeline_log.info("Generative model configuration loaded successfully.")
 
         # API
         self.host = self.api["host"]
         self.port = self.api["port"]
+        self.response_cache_size = self.api["response_cache_size"]
         pipeline_log.info("API configuration loaded successfully.")
 
 
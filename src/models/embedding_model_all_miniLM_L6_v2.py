@@ -1,5 +1,7 @@
 import os
 import sys
+import torch
+from typing import Optional
 from sentence_transformers import SentenceTransformer
 from abc import ABC, abstractmethod
 
@@ -10,6 +12,43 @@ sys.path.append(MAIN_DIR)
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
 
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Dynamically quantized int8 ONNX exports shipped in the model repository, best first,
+# with the CPU flag each one's kernels require
+ONNX_QUANTIZED_FILES = (
+    ("avx512_vnni", "onnx/model_qint8_avx512_vnni.onnx"),
+    ("avx512f", "onnx/model_qint8_avx512.onnx"),
+    ("avx2", "onnx/model_quint8_avx2.onnx"),
+)
+
+
+def resolve_onnx_file(onnx_file_name: Optional[str]) -> Optional[str]:
+    """
+    Resolves "auto" to the int8 ONNX export matching this CPU (VNNI dot-product kernels when
+    available), or to the full-precision export when none of the quantized builds apply.
+
+    Args:
+        onnx_file_name (Optional[str]): ONNX file inside the model repository, or "auto".
+
+    Returns:
+        Optional[str]: The ONNX file to load.
+    """
+    if onnx_file_name != "auto":
+        return onnx_file_name
+
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = set(next((line for line in f if line.startswith("flags")), "").split())
+    except OSError:
+        flags = set()
+
+    for flag, file_name in ONNX_QUANTIZED_FILES:
+        if flag in flags:
+            return file_name
+    return "onnx/model.onnx"
+
+
 class IEmbeddingLoader(ABC):
     """
     Abstract base class for loading sentence transformers for generating embeddings.
@@ -31,10 +70,25 @@ class EmbeddingLoader(IEmbeddingLoader):
     and handle generating sentence embeddings.
     """
 
+    def __init__(self, backend: str = "onnx", onnx_file_name: Optional[str] = "auto"):
+        """
+        Args:
+            backend (str): SentenceTransformer backend, "onnx" or "torch".
+            onnx_file_name (Optional[str]): ONNX export inside the model repository to load
+                                            with the "onnx" backend, or "auto" (default) for the
+                                            int8 export matching this CPU.
+        """
+        self.backend = backend
+        self.onnx_file_name = resolve_onnx_file(onnx_file_name)
+
     def load(self) -> SentenceTransformer:
         """
         Loads the SentenceTransformer model (`all-MiniLM-L6-v2`) and prepares it for generating sentence embeddings.
 
+        On a CUDA host the PyTorch backend is loaded on the GPU in FP16. Otherwise the ONNX Runtime
+        backend is tried first when configured; if it cannot be loaded (e.g. optimum/onnxruntime
+        are not installed) the PyTorch backend is used on the CPU instead.
+
         Returns:
             SentenceTransformer: The loaded SentenceTransformer model.
 
@@ -42,19 +96,45 @@ class EmbeddingLoader(IEmbeddingLoader):
             Exception: If the model fails to load or an error occurs during initialization.
         """
         try:
+            if torch.cuda.is_available():
+                # The quantized ONNX export targets CPU kernels; on a GPU the PyTorch model is faster
+                pipeline_log.info(f"Loading SentenceTransformer model: {MODEL_NAME} (CUDA)...")
+                model = SentenceTransformer(MODEL_NAME, device="cuda")
+                # FP16 halves the bytes moved per matmul and runs on tensor cores
+                model.half()
+                pipeline_log.info(f"SentenceTransformer model '{MODEL_NAME}' loaded successfully on the GPU (FP16).")
+                return self._warm_up(model)
+
+            if self.backend == "onnx":
+                try:
+                    pipeline_log.info(f"Loading SentenceTransformer model: {MODEL_NAME} (ONNX, {self.onnx_file_name})...")
+                    model_kwargs = {"file_name": self.onnx_file_name} if self.onnx_file_name else None
+                    model = SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+                    pipeline_log.info(f"SentenceTransformer model '{MODEL_NAME}' loaded successfully with the ONNX backend.")
+                    return self._warm_up(model)
+                except Exception as e:
+                    pipeline_log.warning(f"ONNX backend unavailable, falling back to PyTorch: {str(e)}")
+
             # Attempt to load the SentenceTransformer model
-            pipeline_log.info("Loading SentenceTransformer model: all-MiniLM-L6-v2...")
-            model = SentenceTransformer("all-MiniLM-L6-v2")
+            pipeline_log.info(f"Loading SentenceTransformer model: {MODEL_NAME}...")
+            model = SentenceTransformer(MODEL_NAME, device="cpu")
 
             # Log success
             pipeline_log.info("Successfully loaded the SentenceTransformer model.")
-            pipeline_log.info("SentenceTransformer model 'all-MiniLM-L6-v2' loaded successfully.")
-            return model
+            pipeline_log.info(f"SentenceTransformer model '{MODEL_NAME}' loaded successfully.")
+            return self._warm_up(model)
         except Exception as e:
             # Log the error if loading fails
             error_log.error(f"Failed to load SentenceTransformer model: {str(e)}")
             raise Exception(f"Error loading SentenceTransformer model: {str(e)}") from e
 
+    @staticmethod
+    def _warm_up(model: SentenceTransformer) -> SentenceTransformer:
+        """Runs one encode so lazy initialization is not paid by the first user query."""
+        model.encode(["warmup"], convert_to_numpy=True, show_progress_bar=False)
+        pipeline_log.info("SentenceTransformer model warmed up.")
+        return model
+
 if __name__ == "__main__":
     embedded = EmbeddingLoader().load()
     embedded
\ No newline at end of file
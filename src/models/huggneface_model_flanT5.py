@@ -1,8 +1,20 @@
 import os
 import sys
-from transformers import pipeline, AutoModelForSeq2SeqLM
+import torch
+from typing import Any, Dict, List, Optional, Union
+from transformers import pipeline, AutoModelForSeq2SeqLM, AutoTokenizer, BitsAndBytesConfig
 from abc import ABC, abstractmethod
 
+try:
+    import ctranslate2
+except ImportError:  # CTranslate2 is optional, the PyTorch pipeline is used without it
+    ctranslate2 = None
+
+try:
+    import bitsandbytes
+except ImportError:  # bitsandbytes is optional, only used for the int8 GPU fallback
+    bitsandbytes = None
+
 # Get the absolute path to the directory one level above the current file's directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
 sys.path.append(MAIN_DIR)
@@ -10,6 +22,69 @@ sys.path.append(MAIN_DIR)
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
 
+MODEL_NAME = "google/flan-t5-base"
+
+
+class FlanT5CT2:
+    """
+    FLAN-T5 served by a CTranslate2 int8 translator.
+
+    Mirrors the call signature and output format of the Hugging Face "text2text-generation"
+    pipeline so it can be passed to `GenerateResponse.generate` unchanged.
+    """
+
+    def __init__(self, model_dir: str, tokenizer_name: str = MODEL_NAME, num_threads: int = 0):
+        """
+        Args:
+            model_dir (str): Directory produced by `ct2-transformers-converter --quantization int8`.
+            tokenizer_name (str): Hugging Face model whose tokenizer matches the converted model.
+            num_threads (int): CPU threads used by the translator. Default is 0 (CTranslate2's default).
+        """
+        if ctranslate2.get_cuda_device_count() > 0:
+            self.translator = ctranslate2.Translator(model_dir, device="cuda", compute_type="int8_float16")
+        else:
+            self.translator = ctranslate2.Translator(model_dir, device="cpu", compute_type="int8",
+                                                     intra_threads=num_threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+    def __call__(
+        self,
+        inputs: Union[str, List[str]],
+        max_length: int = 250,
+        do_sample: bool = True,
+        temperature: float = 1.0,
+        top_p: float = 1.0,
+        top_k: int = 50,
+        num_return_sequences: int = 1,
+        **kwargs,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generates text for one prompt or a list of prompts.
+
+        Returns:
+            List[Dict[str, Any]]: One `{"generated_text": ...}` entry per prompt.
+        """
+        prompts = [inputs] if isinstance(inputs, str) else list(inputs)
+        # Tokenize the whole batch in one call to the fast (Rust) tokenizer
+        source_tokens = [self.tokenizer.convert_ids_to_tokens(ids)
+                         for ids in self.tokenizer(prompts).input_ids]
+
+        results = self.translator.translate_batch(
+            source_tokens,
+            beam_size=1,
+            num_hypotheses=num_return_sequences,
+            max_decoding_length=max_length,
+            sampling_topk=top_k if do_sample else 1,
+            sampling_topp=top_p if do_sample else 1.0,
+            sampling_temperature=temperature if do_sample else 1.0,
+        )
+
+        texts = self.tokenizer.batch_decode(
+            [self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]) for result in results],
+            skip_special_tokens=True,
+        )
+        return [{"generated_text": text} for text in texts]
+
 
 class IFlanT5Load(ABC):
     """
@@ -30,26 +105,77 @@ class IFlanT5Load(ABC):
 class FlanT5Load(IFlanT5Load):
     """
     Concrete class for loading a FLAN-T5 model for text-to-text generation tasks.
-    Implements the 'load' method to load the model from Hugging Face's Model Hub.
+    Uses an int8 CTranslate2 conversion of the model when one is available, and otherwise
+    loads the model from Hugging Face's Model Hub (int8 through bitsandbytes on a GPU when enabled).
     """
 
+    def __init__(self, ct2_model_dir: Optional[str] = None, load_in_8bit: bool = False,
+                 compile_model: bool = False, num_threads: int = 0):
+        """
+        Args:
+            ct2_model_dir (Optional[str]): Directory holding the CTranslate2 int8 conversion of FLAN-T5.
+            num_threads (int): CPU threads used by the CTranslate2 model, so it shares the process's
+                               thread budget with the other inference pools. Default is 0
+                               (CTranslate2's default).
+            load_in_8bit (bool): Quantize the Hugging Face model to int8 with bitsandbytes when it is
+                                 loaded on a GPU. Default is False.
+            compile_model (bool): Compile the Hugging Face model's forward pass with `torch.compile`
+                                  and a static KV cache. Default is False.
+        """
+        self.ct2_model_dir = ct2_model_dir
+        self.load_in_8bit = load_in_8bit
+        self.compile_model = compile_model
+        self.num_threads = num_threads
+
     def load(self) -> AutoModelForSeq2SeqLM:
         """
         Loads the FLAN-T5 model and prepares the text-to-text pipeline for inference.
 
         Returns:
-            pipeline: A Hugging Face pipeline for text-to-text generation using FLAN-T5.
+            pipeline: A Hugging Face pipeline (or the CTranslate2 equivalent) for text-to-text
+                      generation using FLAN-T5.
 
         Raises:
             Exception: If the model fails to load or an error occurs during initialization.
         """
         try:
-            # Attempt to load the FLAN-T5 model from Hugging Face Model Hub
-            pipeline_log.info("Loading FLAN-T5 model...")
-            model_pipeline = pipeline("text2text-generation", model="google/flan-t5-base")
+            if ctranslate2 is not None and self.ct2_model_dir and os.path.isdir(self.ct2_model_dir):
+                pipeline_log.info(f"Loading CTranslate2 int8 FLAN-T5 model from {self.ct2_model_dir}...")
+                model_pipeline = FlanT5CT2(self.ct2_model_dir, num_threads=self.num_threads)
+                pipeline_log.info("Successfully loaded the CTranslate2 FLAN-T5 model.")
+            else:
+                # Attempt to load the FLAN-T5 model from Hugging Face Model Hub
+                pipeline_log.info("Loading FLAN-T5 model...")
+                quantized = False
+                if torch.cuda.is_available() and self.load_in_8bit and bitsandbytes is not None:
+                    model = AutoModelForSeq2SeqLM.from_pretrained(
+                        MODEL_NAME,
+                        quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                        device_map="auto",
+                    )
+                    model_pipeline = pipeline("text2text-generation", model=model,
+                                              tokenizer=AutoTokenizer.from_pretrained(MODEL_NAME))
+                    pipeline_log.info("FLAN-T5 weights quantized to int8 with bitsandbytes.")
+                    quantized = True
+                elif torch.cuda.is_available() and torch.cuda.is_bf16_supported():
+                    # FLAN-T5 was trained in bfloat16; FP16 overflows in T5's feed-forward layers
+                    model_pipeline = pipeline("text2text-generation", model=MODEL_NAME,
+                                              device=0, torch_dtype=torch.bfloat16)
+                elif torch.cuda.is_available():
+                    model_pipeline = pipeline("text2text-generation", model=MODEL_NAME, device=0)
+                else:
+                    model_pipeline = pipeline("text2text-generation", model=MODEL_NAME)
+
+                # Log success
+                pipeline_log.info("Successfully loaded the FLAN-T5 model.")
+
+                # bitsandbytes int8 layers cannot be traced by torch.compile
+                if self.compile_model and not quantized:
+                    self._compile(model_pipeline.model)
 
-            # Log success
-            pipeline_log.info("Successfully loaded the FLAN-T5 model.")
+            # Warm-up generation so lazy initialization is not paid by the first user query
+            model_pipeline("warmup", max_length=8, do_sample=False)
+            pipeline_log.info("FLAN-T5 model warmed up.")
             return model_pipeline
         except Exception as e:
             # Log the error in case of failure
@@ -57,6 +183,17 @@ class FlanT5Load(IFlanT5Load):
             error_log.error(f"Error loading FLAN-T5 model: {str(e)}")
             raise Exception(f"Error loading FLAN-T5 model: {str(e)}") from e
 
+    @staticmethod
+    def _compile(model: AutoModelForSeq2SeqLM) -> None:
+        """
+        Compiles the model's forward pass so each decoder step runs as fused kernels instead of
+        eager per-op dispatch. A static KV cache keeps tensor shapes fixed across steps, which
+        avoids recompilation during generation.
+        """
+        model.generation_config.cache_implementation = "static"
+        model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+        pipeline_log.info("FLAN-T5 forward pass compiled with torch.compile.")
+
 if __name__ == "__main__":
     model = FlanT5Load().load()
     model
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+Shared Chatbot Pipeline: models, FAISS indexes and their source tables.
+"""
+
+import os
+import sys
+import hashlib
+import functools
+from dataclasses import dataclass
+from typing import Any
+
+# CPU inference threads: OpenMP/MKL read these only when torch and FAISS are first imported
+INFERENCE_THREADS = min(8, os.cpu_count() or 1)
+os.environ.setdefault("OMP_NUM_THREADS", str(INFERENCE_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(INFERENCE_THREADS))
+
+import torch
+import faiss
+import numpy as np
+import pandas as pd
+
+# Get the absolute path to the directory containing this file (the `src` directory)
+MAIN_DIR = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(MAIN_DIR)
+
+from utils import pipeline_log
+from utils.files import write_atomic
+from utils.ingest_query_database import IngestQueryDatabase
+from preprocess.combined_tables import CombinedTables
+from preprocess.apply_embedding_combined import EmbeddingForCombined
+from preprocess.faiss_index import FAISSIndex, INDEX_PARAMS
+from models.embedding_model_all_miniLM_L6_v2 import EmbeddingLoader, resolve_onnx_file, \
+    MODEL_NAME as EMBEDDING_MODEL_NAME
+from models.huggneface_model_flanT5 import FlanT5Load
+from config import Config
+
+
+# Sentence encoding scales to about 8 intra-op threads; inter-op parallelism only adds contention
+torch.set_num_threads(INFERENCE_THREADS)
+try:
+    torch.set_num_interop_threads(1)
+except RuntimeError:  # Already fixed once any inter-op work has run in this process
+    pass
+
+# Configurations and pipeline components
+CONFIGRATION = Config(None)
+EMBEDDING_ONNX_FILE = resolve_onnx_file(CONFIGRATION.embedding_onnx_file)
+
+INGESTDATA = IngestQueryDatabase()
+COMBINEDCOLUMNS = CombinedTables()
+EMBEDDINGCOBINED = EmbeddingForCombined()
+FAISSINDEX = FAISSIndex()
+
+
+@dataclass
+class ChatbotPipeline:
+    """
+    Everything needed to answer a query, loaded once per process by `get_pipeline`.
+    """
+    flan: Any
+    embedding: Any
+    faqs_index: faiss.Index
+    menu_index: faiss.Index
+    faqs_df: pd.DataFrame
+    menu_df: pd.DataFrame
+    config: Config
+
+
+def save_index(index: faiss.Index, path: str) -> None:
+    """Persists a FAISS index, replacing any previous file atomically."""
+    write_atomic(path, lambda tmp_path: faiss.write_index(index, tmp_path))
+
+
+def save_embeddings(embeddings: np.ndarray, path: str) -> None:
+    """Persists an embedding matrix as .npy, replacing any previous file atomically."""
+    def write(tmp_path: str) -> None:
+        # np.save appends ".npy" to paths without it, so write through a file object
+        with open(tmp_path, "wb") as f:
+            np.save(f, embeddings)
+
+    write_atomic(path, write)
+
+
+def embedding_variant(embedding_model) -> str:
+    """
+    Names the variant of the embedding model actually loaded: the ONNX file for the ONNX
+    backend, FP16 for PyTorch on a GPU, otherwise plain PyTorch.
+
+    Args:
+        embedding_model (SentenceTransformer): The loaded embedding model.
+
+    Returns:
+        str: e.g. "onnx-model_qint8_avx512_vnni", "torch-fp16" or "torch".
+    """
+    backend = getattr(embedding_model, "backend", "torch")
+    if backend == "onnx":
+        return f"{backend}-{os.path.splitext(os.path.basename(EMBEDDING_ONNX_FILE))[0]}"
+    if embedding_model.device.type == "cuda":
+        return f"{backend}-fp16"
+    return backend
+
+
+def build_or_load_indexes(embedding_model):
+    """
+    Builds the FAQ and menu FAISS indexes, or loads them from the on-disk cache.
+
+    Two cache levels are kept under `cache_dir`:
+      - combined tables and their FP16 embeddings, keyed by a hash of the database file,
+        the queries/columns used to read it and the embedding model variant;
+      - the FAISS indexes, additionally keyed by the index parameters.
+    Below both, `cache_dir/embeddings` holds one embedding per row text, keyed by its content
+    and stored in a few shard files, so a database edit only re-encodes the rows that changed.
+    A change to the index parameters therefore rebuilds the indexes from the memory-mapped
+    embeddings without re-encoding, and any change to the data re-runs the whole pipeline.
+
+    Args:
+        embedding_model (SentenceTransformer): Model used to embed the tables on a cache miss.
+
+    Returns:
+        Tuple: (FAQsIndex, MENUITEMsIndex, FAQsDF_c, MENUITEMsDF_c)
+    """
+    # Embeddings are cached per model variant, since the ONNX int8, PyTorch FP32 and GPU FP16
+    # outputs differ slightly
+    variant = embedding_variant(embedding_model)
+
+    hasher = hashlib.sha1()
+    with open(CONFIGRATION.path_database, "rb") as f:
+        hasher.update(f.read())
+    hasher.update(repr((CONFIGRATION.FAQsQ, CONFIGRATION.columns_faqs,
+                        CONFIGRATION.MENUITEMsQ, CONFIGRATION.columns_menuitems,
+                        variant)).encode())
+    data_prefix = os.path.join(CONFIGRATION.cache_dir, hasher.hexdigest())
+    hasher.update(repr((INDEX_PARAMS, CONFIGRATION.index_spec)).encode())
+    index_prefix = os.path.join(CONFIGRATION.cache_dir, hasher.hexdigest())
+
+    paths = {name: f"{data_prefix}.{name}" for name in ("faqs.pkl", "menu.pkl", "faqs.npy", "menu.npy")}
+    paths.update({name: f"{index_prefix}.{name}" for name in ("faqs.faiss", "menu.faiss")})
+
+    if all(os.path.exists(paths[name]) for name in ("faqs.pkl", "menu.pkl")):
+        FAQsDF_c = pd.read_pickle(paths["faqs.pkl"])
+        MENUITEMsDF_c = pd.read_pickle(paths["menu.pkl"])
+
+        if all(os.path.exists(paths[name]) for name in ("faqs.faiss", "menu.faiss")):
+            pipeline_log.info(f"Loading cached FAISS indexes from {index_prefix}.*")
+            return (FAISSINDEX.read_index(paths["faqs.faiss"]),
+                    FAISSINDEX.read_index(paths["menu.faiss"]),
+                    FAQsDF_c, MENUITEMsDF_c)
+
+        if all(os.path.exists(paths[name]) for name in ("faqs.npy", "menu.npy")):
+            pipeline_log.info(f"Rebuilding FAISS indexes from cached embeddings {data_prefix}.*")
+            # Embeddings are stored as FP16 and widened to FP32 only for index construction
+            FAQs_E = np.load(paths["faqs.npy"], mmap_mode="r").astype(np.float32)
+            MENUITEMs_E = np.load(paths["menu.npy"], mmap_mode="r").astype(np.float32)
+            FAQsIndex = FAISSINDEX.create_faiss_index(embedding_array=FAQs_E,
+                                                      index_spec=CONFIGRATION.index_spec)
+            MENUITEMsIndex = FAISSINDEX.create_faiss_index(embedding_array=MENUITEMs_E,
+                                                           index_spec=CONFIGRATION.index_spec)
+            save_index(FAQsIndex, paths["faqs.faiss"])
+            save_index(MENUITEMsIndex, paths["menu.faiss"])
+            return FAQsIndex, MENUITEMsIndex, FAQsDF_c, MENUITEMsDF_c
+
+    pipeline_log.info("No cached FAISS indexes found, building from the database.")
+    FAQsDF = INGESTDATA.ingest(db_path=CONFIGRATION.path_database, query=CONFIGRATION.FAQsQ)
+    MENUITEMsDF = INGESTDATA.ingest(db_path=CONFIGRATION.path_database, query=CONFIGRATION.MENUITEMsQ)
+
+    # Handle Duplicates
+    FAQsDF = FAQsDF.drop_duplicates()
+    MENUITEMsDF = MENUITEMsDF.drop_duplicates()
+
+    # Combine Columns
+    FAQsDF_c = COMBINEDCOLUMNS.combined(columns=CONFIGRATION.columns_faqs, df=FAQsDF)
+    MENUITEMsDF_c = COMBINEDCOLUMNS.combined(columns=CONFIGRATION.columns_menuitems, df=MENUITEMsDF)
+
+    # Generate Embeddings
+    embedding_cache_dir = os.path.join(CONFIGRATION.cache_dir, "embeddings", f"{EMBEDDING_MODEL_NAME}-{variant}")
+    FAQs_E = EMBEDDINGCOBINED.embedded(embedding_model=embedding_model, df=FAQsDF_c,
+                                       batch_size=CONFIGRATION.embedding_batch_size,
+                                       cache_dir=embedding_cache_dir)
+    MENUITEMs_E = EMBEDDINGCOBINED.embedded(embedding_model=embedding_model, df=MENUITEMsDF_c,
+                                            batch_size=CONFIGRATION.embedding_batch_size,
+                                            cache_dir=embedding_cache_dir)
+
+    # Convert FAISS Index for FAQs & Menu Items
+    FAQsIndex = FAISSINDEX.create_faiss_index(embedding_array=FAQs_E,
+                                              index_spec=CONFIGRATION.index_spec)
+    MENUITEMsIndex = FAISSINDEX.create_faiss_index(embedding_array=MENUITEMs_E,
+                                                   index_spec=CONFIGRATION.index_spec)
+
+    # Persist for the next start
+    os.makedirs(CONFIGRATION.cache_dir, exist_ok=True)
+    # Each file is replaced atomically, so an interrupted run never leaves a partial cache entry
+    write_atomic(paths["faqs.pkl"], FAQsDF_c.to_pickle)
+    write_atomic(paths["menu.pkl"], MENUITEMsDF_c.to_pickle)
+    save_embeddings(FAQs_E.astype(np.float16), paths["faqs.npy"])
+    save_embeddings(MENUITEMs_E.astype(np.float16), paths["menu.npy"])
+    save_index(FAQsIndex, paths["faqs.faiss"])
+    save_index(MENUITEMsIndex, paths["menu.faiss"])
+    pipeline_log.info(f"FAISS indexes cached to {index_prefix}.*")
+
+    return FAQsIndex, MENUITEMsIndex, FAQsDF_c, MENUITEMsDF_c
+
+
+@functools.lru_cache(maxsize=1)
+def get_pipeline() -> ChatbotPipeline:
+    """
+    Loads the models and FAISS indexes on first call and returns the same pipeline afterwards,
+    so every user in a process shares one copy of each model.
+
+    Returns:
+        ChatbotPipeline: The loaded pipeline.
+    """
+    flan = FlanT5Load(ct2_model_dir=CONFIGRATION.ct2_model_dir,
+                      load_in_8bit=CONFIGRATION.load_in_8bit,
+                      compile_model=CONFIGRATION.torch_compile,
+                      num_threads=INFERENCE_THREADS).load()
+    embedding = EmbeddingLoader(backend=CONFIGRATION.embedding_backend,
+                                onnx_file_name=EMBEDDING_ONNX_FILE).load()
+    faqs_index, menu_index, faqs_df, menu_df = build_or_load_indexes(embedding)
+
+    # Indexes are cached on the CPU; search them on the GPU when one is present
+    faqs_index = FAISSINDEX.move_to_gpu(faqs_index)
+    menu_index = FAISSINDEX.move_to_gpu(menu_index)
+    pipeline_log.info("Chatbot pipeline loaded.")
+
+    return ChatbotPipeline(flan=flan, embedding=embedding,
+                           faqs_index=faqs_index, menu_index=menu_index,
+                           faqs_df=faqs_df, menu_df=menu_df,
+                           config=CONFIGRATION)
@@ -4,9 +4,12 @@ Apply Embedding for Combined DataFrame.
 
 import os
 import sys
+import hashlib
 import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Optional
 from sentence_transformers import SentenceTransformer
 
 # Get the absolute path to the directory one level above the current file's directory
@@ -15,6 +18,14 @@ sys.path.append(MAIN_DIR)
 
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
+from utils.files import write_atomic
+
+# Default rows per forward pass for each device type
+DEFAULT_BATCH_SIZES = {"cuda": 128, "cpu": 32}
+
+# The embedding cache is split into 16 shard files by the first hex digit of each text's hash,
+# so an update rewrites only the shards it touches
+CACHE_SHARD_PREFIX_LENGTH = 1
 
 
 class IEmbeddingForCombined(ABC):
@@ -24,7 +35,13 @@ class IEmbeddingForCombined(ABC):
 
     @abstractmethod
     def embedded(
-        self, embedding_model: SentenceTransformer, df: pd.DataFrame, column: str
+        self,
+        embedding_model: SentenceTransformer,
+        df: pd.DataFrame,
+        column: str,
+        batch_size: Optional[int],
+        device: Optional[str],
+        cache_dir: Optional[str],
     ) -> np.ndarray:
         """
         Abstract method to apply embeddings to a specified column.
@@ -33,6 +50,9 @@ class IEmbeddingForCombined(ABC):
             embedding_model (SentenceTransformer): Pretrained SentenceTransformer model for generating embeddings.
             df (pd.DataFrame): Input DataFrame containing the data.
             column (str): Name of the column to apply embeddings to.
+            batch_size (Optional[int]): Number of rows encoded per forward pass.
+            device (Optional[str]): Device to encode on.
+            cache_dir (Optional[str]): Directory of per-text embedding files reused across runs.
 
         Returns:
             np.ndarray: NumPy array with array embeddings.
@@ -49,15 +69,32 @@ class EmbeddingForCombined(IEmbeddingForCombined):
     """
 
     def embedded(
-        self, embedding_model: SentenceTransformer, df: pd.DataFrame, column: str = "combined"
+        self,
+        embedding_model: SentenceTransformer,
+        df: pd.DataFrame,
+        column: str = "combined",
+        batch_size: Optional[int] = None,
+        device: Optional[str] = None,
+        cache_dir: Optional[str] = None,
     ) -> np.ndarray:
         """
         Applies embeddings to a specified column in the DataFrame.
 
+        Rows are encoded in length-sorted batches of L2-normalized embeddings; the returned
+        array keeps the original row order. With a `cache_dir`, each text's embedding is stored
+        under a hash of its content (in a few shard files) and only texts without a stored
+        embedding are encoded.
+
         Args:
             embedding_model (SentenceTransformer): Pretrained SentenceTransformer model for generating embeddings.
             df (pd.DataFrame): Input DataFrame containing the data.
             column (str): Name of the column to apply embeddings to.
+            batch_size (Optional[int]): Number of rows encoded per forward pass. Defaults to
+                                        128 on a GPU and 32 on the CPU.
+            device (Optional[str]): Device to encode on, e.g. "cuda" or "cpu". Defaults to the
+                                    device the model was loaded on.
+            cache_dir (Optional[str]): Directory of per-text embedding files reused across runs.
+                                       It must be specific to the embedding model. Default is None (no cache).
 
         Returns:
             np.ndarray: NumPy array with array embeddings.
@@ -86,23 +123,35 @@ class EmbeddingForCombined(IEmbeddingForCombined):
             error_log.error(error_msg)
             raise ValueError(error_msg)
 
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size <= 0):
+            error_msg = "The 'batch_size' must be a positive integer."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
+        device = device or str(embedding_model.device)
+        if batch_size is None:
+            batch_size = DEFAULT_BATCH_SIZES.get(device.split(":")[0], DEFAULT_BATCH_SIZES["cpu"])
+
         # Log the start of the embedding process
-        pipeline_log.info(f"Starting embedding for column: {column}")
+        pipeline_log.info(f"Starting embedding for column: {column} (device={device}, batch_size={batch_size})")
 
         try:
-            # Apply embeddings to the specified column
-            df[f"{column}_embedding"] = df[column].apply(
-                lambda x: embedding_model.encode(x)
-            )
+            texts = df[column].astype(str).tolist()
+            embeddings = self._load_cached(texts, cache_dir) if cache_dir else [None] * len(texts)
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if cache_dir:
+                pipeline_log.info(f"Embedding cache hits for column {column}: {len(texts) - len(missing)}/{len(texts)}")
+
+            if missing:
+                new_embeddings = self._encode(embedding_model, [texts[i] for i in missing], batch_size, device)
+                for i, embedding in zip(missing, new_embeddings):
+                    embeddings[i] = embedding
+                if cache_dir:
+                    self._store_cached([texts[i] for i in missing], new_embeddings, cache_dir)
+
+            embeddings_array = np.vstack(embeddings)
             pipeline_log.info(f"Successfully generated embeddings for column: {column}")
 
-            # Collect all embeddings into a list
-            embeddings_list = df[f"{column}_embedding"].tolist()
-
-            # Stack the embeddings into a NumPy array
-            embeddings_array = np.vstack(embeddings_list)
-            pipeline_log.info("Successfully converted embeddings to a NumPy array.")
-
         except Exception as e:
             error_msg = f"An error occurred while generating embeddings: {e}"
             error_log.error(error_msg)
@@ -111,6 +160,72 @@ class EmbeddingForCombined(IEmbeddingForCombined):
         # Return the NumPy array of embeddings
         return embeddings_array
 
+    @staticmethod
+    def _encode(
+        embedding_model: SentenceTransformer, texts: List[str], batch_size: int, device: str
+    ) -> np.ndarray:
+        """Encodes texts in length-sorted batches and returns the embeddings in input order."""
+        # Sort rows by character length (a close proxy for token count) so each batch pads to a
+        # similar length, then encode in batches
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        sorted_embeddings = embedding_model.encode(
+            [texts[i] for i in order],
+            batch_size=batch_size,
+            device=device,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
+        # Restore the original row order
+        embeddings_array = np.empty_like(sorted_embeddings)
+        embeddings_array[order] = sorted_embeddings
+        return embeddings_array
+
+    @staticmethod
+    def _cache_key(text: str) -> str:
+        """Cache key of a text: a hash of its content."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _shard_path(shard: str, cache_dir: str) -> str:
+        """Path of the shard file holding the keys that start with `shard`."""
+        return os.path.join(cache_dir, f"shard-{shard}.npz")
+
+    def _read_shard(self, shard: str, cache_dir: str) -> Dict[str, np.ndarray]:
+        """Returns the embeddings stored in a shard by key, or nothing if it does not exist."""
+        path = self._shard_path(shard, cache_dir)
+        if not os.path.exists(path):
+            return {}
+        with np.load(path) as stored:
+            return dict(zip(stored["keys"].tolist(), stored["embeddings"]))
+
+    def _load_cached(self, texts: List[str], cache_dir: str) -> List[Optional[np.ndarray]]:
+        """Returns the cached embedding of each text, or None where there is none."""
+        keys = [self._cache_key(text) for text in texts]
+        shards = {shard: self._read_shard(shard, cache_dir)
+                  for shard in {key[:CACHE_SHARD_PREFIX_LENGTH] for key in keys}}
+        return [shards[key[:CACHE_SHARD_PREFIX_LENGTH]].get(key) for key in keys]
+
+    def _store_cached(self, texts: List[str], embeddings: np.ndarray, cache_dir: str) -> None:
+        """Adds the embeddings to their shards, replacing each touched shard file atomically."""
+        os.makedirs(cache_dir, exist_ok=True)
+        by_shard = defaultdict(dict)
+        for text, embedding in zip(texts, embeddings):
+            key = self._cache_key(text)
+            by_shard[key[:CACHE_SHARD_PREFIX_LENGTH]][key] = embedding
+
+        for shard, new_embeddings in by_shard.items():
+            stored = self._read_shard(shard, cache_dir)
+            stored.update(new_embeddings)
+            write_atomic(self._shard_path(shard, cache_dir), lambda path: self._write_shard(path, stored))
+
+    @staticmethod
+    def _write_shard(path: str, stored: Dict[str, np.ndarray]) -> None:
+        """Writes a shard's keys and embeddings as one .npz file."""
+        with open(path, "wb") as f:
+            np.savez(f, keys=np.array(list(stored)), embeddings=np.stack(list(stored.values())))
+
 
 # Example usage
 if __name__ == "__main__":
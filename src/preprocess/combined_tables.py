@@ -46,7 +46,7 @@ class CombinedTables(ICombinedTables):
             pd.DataFrame: The modified DataFrame with a new 'combined' column.
 
         Raises:
-            ValueError: If `columns` is not a list or `df` is not a DataFrame, 
+            ValueError: If `columns` is not a non-empty list or `df` is not a DataFrame, 
                         or if any column in `columns` does not exist in `df`.
         """
         pipeline_log.info("Starting Combining Columns")
@@ -54,17 +54,22 @@ class CombinedTables(ICombinedTables):
         if not isinstance(columns, list):
             error_log.error("The 'columns' parameter must be a list of column names.")
             raise ValueError("The 'columns' parameter must be a list of column names.")
-        pipeline_log.info("Verified Types Columns")
         if not isinstance(df, pd.DataFrame):
             error_log.error("The 'df' parameter must be a pandas DataFrame.")
             raise ValueError("The 'df' parameter must be a pandas DataFrame.")
-        pipeline_log.info("Verified Types Data")
-        for col in columns:
-            if col not in df.columns:
-                error_log.error(f"Column '{col}' does not exist in the DataFrame.")
-
-        # Combine the specified columns into a new column named 'combined'
-        df["combined"] = df[columns].astype(str).agg(' '.join, axis=1)
+        if not columns:
+            error_msg = "The 'columns' parameter must name at least one column."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            error_msg = f"Missing columns: {missing}"
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
+        # Combine the specified columns into a new column named 'combined' (vectorized join)
+        sub = df[columns].astype(str)
+        df["combined"] = sub[columns[0]].str.cat([sub[col] for col in columns[1:]], sep=' ')
         pipeline_log.info("Successfully Combined Columns")
 
         return df
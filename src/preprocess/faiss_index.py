@@ -4,9 +4,11 @@ Create FAISS Index
 
 import os
 import sys
+import math
 import faiss
 import numpy as np
 from abc import ABC, abstractmethod
+from typing import Optional
 
 # Get the absolute path to the directory one level above the current file's directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -15,6 +17,36 @@ sys.path.append(MAIN_DIR)
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
 
+# Embeddings are L2-normalized, so inner product ranks by cosine similarity
+INDEX_METRIC = faiss.METRIC_INNER_PRODUCT
+
+# HNSW graph parameters
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Graph vectors are stored as FP16, halving the bytes read per distance computation
+HNSW_STORAGE = "SQfp16"
+
+# Corpora larger than this are stored compressed in an IVF-PQ index instead of a graph,
+# with IVF_NLIST_FACTOR * sqrt(num_samples) inverted lists
+IVFPQ_MIN_SAMPLES = 10_000
+IVF_NLIST_FACTOR = 4
+IVFPQ_CODE = "PQ16"
+IVF_NPROBE = 16
+
+# Everything that determines how an index is built, used to key persisted indexes
+INDEX_PARAMS = (INDEX_METRIC, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, HNSW_STORAGE,
+                IVFPQ_MIN_SAMPLES, IVF_NLIST_FACTOR, IVFPQ_CODE, IVF_NPROBE)
+
+# GPU scratch memory reserved for each index moved to the GPU. Brute-force search over these
+# small corpora needs far less than the default reservation (a share of VRAM).
+GPU_TEMP_MEMORY = 64 * 1024 * 1024
+# One StandardGpuResources per GPU index: the two indexes are searched from different CPU
+# threads at the same time, and a resources object (scratch memory, stream) must not be shared
+# across threads. The list keeps them alive for as long as their indexes.
+_GPU_RESOURCES = []
+
 
 class IFAISSIndex(ABC):
     """
@@ -22,37 +54,73 @@ class IFAISSIndex(ABC):
     """
 
     @abstractmethod
-    def create_faiss_index(self, embedding_array: np.ndarray) -> faiss.IndexFlatL2:
+    def create_faiss_index(self, embedding_array: np.ndarray, index_spec: Optional[str] = None) -> faiss.Index:
         """
         Abstract method to create a FAISS index for fast similarity search.
 
         Args:
             embedding_array (np.ndarray): NumPy array containing embeddings.
+            index_spec (Optional[str]): `faiss.index_factory` description of the index to build.
 
         Returns:
-            faiss.IndexFlatL2: A FAISS index object for similarity search.
+            faiss.Index: A FAISS index object for similarity search.
 
         Raises:
             ValueError: If the input embeddings are not valid.
         """
         pass
 
+    @abstractmethod
+    def read_index(self, path: str) -> faiss.Index:
+        """
+        Abstract method to load a FAISS index persisted with `faiss.write_index`.
+
+        Args:
+            path (str): Path of the index file.
+
+        Returns:
+            faiss.Index: The loaded FAISS index.
+        """
+        pass
+
+    @abstractmethod
+    def move_to_gpu(self, index: faiss.Index) -> faiss.Index:
+        """
+        Abstract method to place a FAISS index on the GPU when one is available.
+
+        Args:
+            index (faiss.Index): CPU FAISS index.
+
+        Returns:
+            faiss.Index: The GPU index, or the unchanged CPU index when no GPU is available.
+        """
+        pass
+
 
 class FAISSIndex(IFAISSIndex):
     """
     Implementation of FAISS index creation and management.
     """
 
-    def create_faiss_index(self, embedding_array: np.ndarray) -> faiss.IndexFlatL2:
+    def create_faiss_index(self, embedding_array: np.ndarray, index_spec: Optional[str] = None) -> faiss.Index:
         """
-        Creates a FAISS index for fast similarity search using L2 distance.
+        Creates a FAISS index for fast approximate cosine similarity search
+        (inner product on L2-normalized embeddings). The embeddings are converted to C-contiguous
+        float32 (a no-op for encoder output) and L2-normalized in place first, so vectors widened
+        from the FP16 cache or produced by other encoders rank correctly.
+
+        Without an `index_spec`, an HNSW graph over FP16 vectors is used for the FAQ/menu sized
+        corpora; above `IVFPQ_MIN_SAMPLES` rows the vectors are product-quantized into an IVF index
+        to bound memory, with the number of inverted lists growing as the square root of the corpus size.
 
         Args:
             embedding_array (np.ndarray): NumPy array containing embeddings. 
                 Shape should be (num_samples, embedding_dimension).
+            index_spec (Optional[str]): `faiss.index_factory` description of the index to build,
+                e.g. "HNSW32,SQfp16" or "IVF256,PQ16x8". Default is None (chosen from the corpus size).
 
         Returns:
-            faiss.IndexFlatL2: A FAISS index object for similarity search.
+            faiss.Index: A FAISS index object for similarity search.
 
         Raises:
             ValueError: If the input embeddings are not valid.
@@ -73,12 +141,30 @@ class FAISSIndex(IFAISSIndex):
         pipeline_log.info(
             f"Starting FAISS index creation. Embedding array shape: {embedding_array.shape}"
         )
+        # faiss-cpu wheels ship generic/AVX2/AVX-512 builds and load the best one the CPU supports
+        pipeline_log.info(f"FAISS build options: {faiss.get_compile_options()}")
 
         try:
             # Create FAISS index
-            embedding_dimension = embedding_array.shape[1]
-            index = faiss.IndexFlatL2(embedding_dimension)
-            pipeline_log.info("FAISS index created successfully.")
+            num_samples, embedding_dimension = embedding_array.shape
+            # FAISS kernels read C-contiguous float32 directly; anything else would be copied per call
+            embedding_array = np.ascontiguousarray(embedding_array, dtype=np.float32)
+            assert embedding_array.flags["C_CONTIGUOUS"]
+            faiss.normalize_L2(embedding_array)
+            if index_spec is None:
+                index_spec = (f"IVF{int(IVF_NLIST_FACTOR * math.sqrt(num_samples))},{IVFPQ_CODE}"
+                              if num_samples >= IVFPQ_MIN_SAMPLES else f"HNSW{HNSW_M},{HNSW_STORAGE}")
+            index = faiss.index_factory(embedding_dimension, index_spec, INDEX_METRIC)
+
+            if isinstance(index, faiss.IndexHNSW):
+                index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+                index.hnsw.efSearch = HNSW_EF_SEARCH
+            if not index.is_trained:
+                index.train(embedding_array)
+            ivf_index = faiss.try_extract_index_ivf(index)
+            if ivf_index is not None:
+                ivf_index.nprobe = IVF_NPROBE
+            pipeline_log.info(f"FAISS {index_spec} index created successfully.")
 
             # Add embeddings to the index
             index.add(embedding_array)
@@ -95,6 +181,77 @@ class FAISSIndex(IFAISSIndex):
         # Return the FAISS index
         return index
 
+    def read_index(self, path: str) -> faiss.Index:
+        """
+        Loads a FAISS index persisted with `faiss.write_index`.
+
+        The inverted lists of IVF indexes are memory-mapped from the file rather than read into
+        memory, so only the lists that searches touch become resident. Other index types do not
+        use the flag and are read as usual.
+
+        Args:
+            path (str): Path of the index file.
+
+        Returns:
+            faiss.Index: The loaded FAISS index.
+
+        Raises:
+            FileNotFoundError: If the index file does not exist.
+            RuntimeError: If the file cannot be read as a FAISS index.
+        """
+        if not os.path.exists(path):
+            error_msg = f"The FAISS index file at {path} does not exist."
+            error_log.error(error_msg)
+            raise FileNotFoundError(error_msg)
+
+        try:
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP)
+        except Exception as e:
+            error_msg = f"An error occurred while reading the FAISS index {path}: {e}"
+            error_log.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        pipeline_log.info(f"FAISS index with {index.ntotal} vectors loaded from {path}.")
+        return index
+
+    def move_to_gpu(self, index: faiss.Index) -> faiss.Index:
+        """
+        Copies a CPU FAISS index to GPU 0 when FAISS was built with GPU support and a GPU is present.
+
+        HNSW has no GPU implementation, so HNSW indexes are re-materialized as a flat index
+        with the same metric, which is brute-forced efficiently on the GPU.
+
+        Args:
+            index (faiss.Index): CPU FAISS index, as returned by `create_faiss_index`.
+
+        Returns:
+            faiss.Index: The GPU index, or the unchanged CPU index when no GPU is available.
+
+        Raises:
+            RuntimeError: If copying the index to the GPU fails.
+        """
+        if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+            return index
+
+        try:
+            if isinstance(index, faiss.IndexHNSW):
+                flat_index = faiss.IndexFlat(index.d, index.metric_type)
+                flat_index.add(index.reconstruct_n(0, index.ntotal))
+                index = flat_index
+
+            gpu_resources = faiss.StandardGpuResources()
+            gpu_resources.setTempMemory(GPU_TEMP_MEMORY)
+            gpu_index = faiss.index_cpu_to_gpu(gpu_resources, 0, index)
+            _GPU_RESOURCES.append(gpu_resources)
+            pipeline_log.info(f"FAISS index with {gpu_index.ntotal} vectors moved to GPU 0.")
+
+        except Exception as e:
+            error_msg = f"An error occurred while moving the FAISS index to the GPU: {e}"
+            error_log.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        return gpu_index
+
 
 # Example Usage
 if __name__ == "__main__":
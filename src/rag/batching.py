@@ -0,0 +1,235 @@
+"""
+Micro-batch Retrieval and Response Generation across Concurrent Requests.
+"""
+
+import os
+import sys
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+
+# Get the absolute path to the directory one level above the current file's directory
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(MAIN_DIR)
+
+# Importing logging utilities (assuming they are implemented in 'utils')
+from utils import pipeline_log, error_log
+from rag.retrieval import Retrieve
+from rag.respons_generation import GenerateResponse
+
+
+class IGenerationBatcher(ABC):
+    """
+    Abstract interface for queuing generation requests and serving them in batches.
+    """
+
+    @abstractmethod
+    async def submit(self, query: str, retriever: Dict[str, Any]) -> str:
+        """
+        Abstract method to queue a query for generation and wait for its response.
+
+        Args:
+            query (str): User query.
+            retriever (Dict[str, Any]): Retrieved context for the query.
+
+        Returns:
+            str: Generated response.
+        """
+        pass
+
+
+class IRetrievalBatcher(ABC):
+    """
+    Abstract interface for queuing retrieval requests and serving them in batches.
+    """
+
+    @abstractmethod
+    async def submit(self, query: str) -> Dict[str, Any]:
+        """
+        Abstract method to queue a query for retrieval and wait for its results.
+
+        Args:
+            query (str): User query.
+
+        Returns:
+            Dict[str, Any]: Retrieved results, as returned by `Retrieve.retrieve`.
+        """
+        pass
+
+
+class _MicroBatcher(ABC):
+    """
+    Shared queueing for the batchers below.
+
+    A background task waits for the first queued request, then keeps collecting for up to
+    `max_wait_ms` or until `max_batch_size` requests are queued, and passes the whole batch to
+    `_process` in a worker thread. Each request's future receives its own result.
+    """
+
+    def __init__(self, name: str, max_batch_size: int, max_wait_ms: float):
+        """
+        Args:
+            name (str): Name used in log messages.
+            max_batch_size (int): Maximum number of requests processed together.
+            max_wait_ms (float): Maximum time to wait for more requests once one is queued.
+        """
+        if not isinstance(max_batch_size, int) or max_batch_size <= 0:
+            error_msg = "The 'max_batch_size' must be a positive integer."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[tuple, asyncio.Future]]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Starts the background batching task on the running event loop."""
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            pipeline_log.info(f"{self.name} batcher started (max_batch_size={self.max_batch_size}, "
+                              f"max_wait={self.max_wait * 1000:.0f} ms).")
+
+    async def stop(self) -> None:
+        """Cancels the background batching task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _enqueue(self, *item: Any) -> Any:
+        """Queues one request and waits for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[tuple, asyncio.Future]]:
+        """Waits for one request, then gathers more until the batch is full or the wait expires."""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    @abstractmethod
+    def _process(self, items: List[tuple]) -> List[Any]:
+        """Serves a batch of requests, returning one result per request in order."""
+        pass
+
+    async def _run(self) -> None:
+        """Background loop serving queued requests in batches."""
+        while True:
+            # Requests whose caller has gone away (e.g. a cancelled HTTP request) are not processed
+            batch = [entry for entry in await self._collect() if not entry[1].done()]
+            if not batch:
+                continue
+            try:
+                results = await asyncio.to_thread(self._process, [item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                error_log.error(f"Batched {self.name.lower()} failed for {len(batch)} queries: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+class GenerationBatcher(_MicroBatcher, IGenerationBatcher):
+    """
+    Collects queries from concurrent requests and generates their responses with one
+    batched model call (`GenerateResponse.generate_batch`).
+    """
+
+    def __init__(
+        self,
+        generate_model,
+        generation_kwargs: Dict[str, Any],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+    ):
+        """
+        Args:
+            generate_model (): Pretrained Hugging Face model (or pipeline-compatible wrapper) for text generation.
+            generation_kwargs (Dict[str, Any]): Sampling arguments passed to `generate_batch`
+                                                (max_length, do_sample, temperature, top_p, top_k,
+                                                max_context_tokens).
+            max_batch_size (int): Maximum number of queries generated together. Default is 8.
+            max_wait_ms (float): Maximum time to wait for more queries once one is queued. Default is 10.
+        """
+        super().__init__("Generation", max_batch_size, max_wait_ms)
+        self.generate_model = generate_model
+        self.generation_kwargs = generation_kwargs
+        self.generator = GenerateResponse()
+
+    async def submit(self, query: str, retriever: Dict[str, Any]) -> str:
+        """
+        Queues a query for generation and waits for its response.
+
+        Args:
+            query (str): User query.
+            retriever (Dict[str, Any]): Retrieved context for the query.
+
+        Returns:
+            str: Generated response.
+        """
+        return await self._enqueue(query, retriever)
+
+    def _process(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        return self.generator.generate_batch(
+            queries=[query for query, _ in items],
+            retrievers=[retriever for _, retriever in items],
+            generate_model=self.generate_model,
+            **self.generation_kwargs,
+        )
+
+
+class RetrievalBatcher(_MicroBatcher, IRetrievalBatcher):
+    """
+    Collects queries from concurrent requests, encodes them together and searches each FAISS
+    index once for the whole batch (`Retrieve.retrieve_batch`).
+    """
+
+    def __init__(
+        self,
+        retriever: Retrieve,
+        top_k: int = 3,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            retriever (Retrieve): Retriever bound to the embedding model and FAISS indices.
+            top_k (int): Number of top results to retrieve from each index. Default is 3.
+            max_batch_size (int): Maximum number of queries searched together. Default is 32.
+            max_wait_ms (float): Maximum time to wait for more queries once one is queued. Default is 5.
+        """
+        super().__init__("Retrieval", max_batch_size, max_wait_ms)
+        self.retriever = retriever
+        self.top_k = top_k
+
+    async def submit(self, query: str) -> Dict[str, Any]:
+        """
+        Queues a query for retrieval and waits for its results.
+
+        Args:
+            query (str): User query.
+
+        Returns:
+            Dict[str, Any]: Retrieved results, as returned by `Retrieve.retrieve`.
+        """
+        return await self._enqueue(query)
+
+    def _process(self, items: List[Tuple[str]]) -> List[Dict[str, Any]]:
+        return self.retriever.retrieve_batch(queries=[query for query, in items], top_k=self.top_k)
@@ -4,8 +4,9 @@ Generate Responses using a Hugging Face Seq2Seq Model.
 
 import os
 import sys
+import torch
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 # Get the absolute path to the directory one level above the current file's directory
 MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
@@ -31,6 +32,7 @@ class IGenerateResponse(ABC):
         temperature: float = 0.5,
         top_p: float = 0.6,
         top_k: int = 50,
+        max_context_tokens: Optional[int] = None,
     ) -> str:
         """
         Abstract method to generate a response.
@@ -44,6 +46,8 @@ class IGenerateResponse(ABC):
             temperature (float): Sampling temperature. Default is 0.5.
             top_p (float): Nucleus sampling probability. Default is 0.6.
             top_k (int): Top-K sampling value. Default is 50.
+            max_context_tokens (Optional[int]): Token budget for the whole prompt; the lowest ranked
+                                                retrieved entries are left out to fit it. Default is None (no limit).
 
         Returns:
             str: Generated response.
@@ -53,6 +57,36 @@ class IGenerateResponse(ABC):
         """
         pass
 
+    @abstractmethod
+    def generate_batch(
+        self,
+        queries: List[str],
+        retrievers: List[Dict[str, Any]],
+        generate_model,
+        max_length: int = 250,
+        do_sample: bool = True,
+        temperature: float = 0.5,
+        top_p: float = 0.6,
+        top_k: int = 50,
+        max_context_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Abstract method to generate one response per query in a single model call.
+
+        Args:
+            queries (List[str]): User queries.
+            retrievers (List[Dict[str, Any]]): Retrieved context for each query, in the same order.
+            generate_model (): Pretrained Hugging Face model for text generation.
+            max_length, do_sample, temperature, top_p, top_k, max_context_tokens: As for `generate`.
+
+        Returns:
+            List[str]: Generated responses, in query order.
+
+        Raises:
+            ValueError: If inputs are invalid.
+        """
+        pass
+
 
 class GenerateResponse(IGenerateResponse):
     """
@@ -69,6 +103,7 @@ class GenerateResponse(IGenerateResponse):
         temperature: float = 0.5,
         top_p: float = 0.6,
         top_k: int = 50,
+        max_context_tokens: Optional[int] = None,
     ) -> str:
         """
         Generate a response based on the user query and retrieved context.
@@ -82,10 +117,113 @@ class GenerateResponse(IGenerateResponse):
             temperature (float): Sampling temperature. Default is 0.5.
             top_p (float): Nucleus sampling probability. Default is 0.6.
             top_k (int): Top-K sampling value. Default is 50.
+            max_context_tokens (Optional[int]): Token budget for the whole prompt; the lowest ranked
+                                                retrieved entries are left out to fit it. Default is None (no limit).
 
         Returns:
             str: Generated response.
         """
+        context = self.build_context(query=query, retriever=retriever,
+                                     tokenizer=getattr(generate_model, "tokenizer", None),
+                                     max_context_tokens=max_context_tokens)
+
+        try:
+            # Generate response (no autograd bookkeeping for the PyTorch pipeline)
+            with torch.inference_mode():
+                response = generate_model(
+                    context,
+                    max_length=max_length,
+                    do_sample=do_sample,
+                    temperature=temperature,
+                    top_p=top_p,
+                    top_k=top_k,
+                    num_return_sequences=1,
+                )
+
+            pipeline_log.info("Response generated successfully.")
+            return response[0]['generated_text']
+        except Exception as e:
+            error_msg = f"An error occurred during response generation: {e}"
+            error_log.error(error_msg)
+            raise RuntimeError(error_msg)
+
+    def generate_batch(
+        self,
+        queries: List[str],
+        retrievers: List[Dict[str, Any]],
+        generate_model,
+        max_length: int = 250,
+        do_sample: bool = True,
+        temperature: float = 0.5,
+        top_p: float = 0.6,
+        top_k: int = 50,
+        max_context_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Generate one response per query, passing all prompts to the model in a single batched call.
+
+        Args:
+            queries (List[str]): User queries.
+            retrievers (List[Dict[str, Any]]): Retrieved context for each query, in the same order.
+            generate_model (): Pretrained Hugging Face model for text generation.
+            max_length, do_sample, temperature, top_p, top_k, max_context_tokens: As for `generate`.
+
+        Returns:
+            List[str]: Generated responses, in query order.
+        """
+        if len(queries) != len(retrievers):
+            error_msg = "The 'queries' and 'retrievers' must have the same length."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
+        tokenizer = getattr(generate_model, "tokenizer", None)
+        contexts = [self.build_context(query=query, retriever=retriever,
+                                       tokenizer=tokenizer, max_context_tokens=max_context_tokens)
+                    for query, retriever in zip(queries, retrievers)]
+
+        try:
+            # Generate all responses in one model call
+            with torch.inference_mode():
+                responses = generate_model(
+                    contexts,
+                    batch_size=len(contexts),
+                    max_length=max_length,
+                    do_sample=do_sample,
+                    temperature=temperature,
+                    top_p=top_p,
+                    top_k=top_k,
+                    num_return_sequences=1,
+                )
+
+            pipeline_log.info(f"Batch of {len(contexts)} responses generated successfully.")
+            return [response['generated_text'] for response in responses]
+        except Exception as e:
+            error_msg = f"An error occurred during batched response generation: {e}"
+            error_log.error(error_msg)
+            raise RuntimeError(error_msg)
+
+    def build_context(
+        self,
+        query: str,
+        retriever: Dict[str, Any],
+        tokenizer=None,
+        max_context_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Build the model prompt from the user query and its retrieved FAQs and menu items.
+
+        When both `tokenizer` and `max_context_tokens` are given, retrieved entries are added
+        best-ranked first (alternating FAQs and menu items) while they fit the token budget.
+
+        Args:
+            query (str): User query.
+            retriever (Dict[str, Any]): Retrieved context from FAISS or other retrieval mechanism.
+            tokenizer (): Tokenizer of the generative model, used to measure entries. Default is None.
+            max_context_tokens (Optional[int]): Token budget for the whole prompt. Default is None (no limit).
+
+        Returns:
+            str: Prompt for the generative model.
+        """
         # Validate inputs
         if not isinstance(query, str):
             error_msg = "The 'query' must be a string."
@@ -97,42 +235,71 @@ class GenerateResponse(IGenerateResponse):
             error_log.error(error_msg)
             raise ValueError(error_msg)
 
+        if max_context_tokens is not None and (not isinstance(max_context_tokens, int) or max_context_tokens <= 0):
+            error_msg = "The 'max_context_tokens' must be a positive integer."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
         # Start generating context
         pipeline_log.info("Generating context for the model.")
         faq_results = retriever['_1_result']
         menu_results = retriever['_2_result']
-        # Step 3: Prepare Context for Generation
-        context = "You are a helpful assistant muslim for a restaurant in Saudi Arabia and your name AlRashid. Answer the question based on the provided context.:\n\n"
+        # Step 3: Prepare Context for Generation (parts are joined once at the end)
+        fixed_parts = [
+            "You are a helpful assistant muslim for a restaurant in Saudi Arabia and your name AlRashid. Answer the question based on the provided context.:\n\n",
+            "FAQs:\n",
+            "\nMenu Items:\n",
+            f"\nUser Query: {query}\n\n",
+        ]
+        faq_lines = [f"- Q: {faq['question']} A: {faq['answer']}\n" for faq in faq_results]
+        menu_lines = [
+            f"- {item['name']}: {item['description']} (Ingredients: {item['ingredients']}, Allergens: {item['allergens']})\n"
+            for item in menu_results
+        ]
 
-        # Add FAQ context if the query is FAQ-related
-        context += "FAQs:\n"
-        for faq in faq_results:
-            context += f"- Q: {faq['question']} A: {faq['answer']}\n"
-
-        context += "\nMenu Items:\n"
-        for item in menu_results:
-            context += f"- {item['name']}: {item['description']} (Ingredients: {item['ingredients']}, Allergens: {item['allergens']})\n"
+        if tokenizer is not None and max_context_tokens is not None:
+            faq_lines, menu_lines = self._fit_token_budget(
+                tokenizer, fixed_parts, faq_lines, menu_lines, max_context_tokens
+            )
 
-        # Ensure the user query is included in the prompt
-        context += f"\nUser Query: {query}\n\n"
+        # System prompt, FAQ context, menu context, then the user query
+        context = "".join([fixed_parts[0], fixed_parts[1], *faq_lines, fixed_parts[2], *menu_lines, fixed_parts[3]])
         pipeline_log.info("Context generated successfully.")
-        pipeline_log.debug(f"Generated context: {context}")
+        pipeline_log.debug("Generated context: %s", context)
+        return context
 
-        try:
-            # Generate response
-            response = generate_model(
-                context,
-                max_length=max_length,
-                do_sample=do_sample,
-                temperature=temperature,
-                top_p=top_p,
-                top_k=top_k,
-                num_return_sequences=1,
-            )
+    @staticmethod
+    def _fit_token_budget(
+        tokenizer,
+        fixed_parts: List[str],
+        faq_lines: List[str],
+        menu_lines: List[str],
+        max_context_tokens: int,
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Keeps the best-ranked FAQ and menu lines that fit in the token budget left after the
+        fixed parts of the prompt, preserving their order.
+        """
+        lengths = [len(ids) for ids in
+                   tokenizer(fixed_parts + faq_lines + menu_lines, add_special_tokens=False)["input_ids"]]
+        # The budget covers the encoded prompt, including the EOS token the tokenizer appends
+        budget = max_context_tokens - tokenizer.num_special_tokens_to_add() - sum(lengths[:len(fixed_parts)])
+        if budget < 0:
+            pipeline_log.warning(f"The fixed prompt alone exceeds {max_context_tokens} tokens; no retrieved entries fit.")
+            budget = 0
+        faq_lengths = lengths[len(fixed_parts):len(fixed_parts) + len(faq_lines)]
+        menu_lengths = lengths[len(fixed_parts) + len(faq_lines):]
 
-            pipeline_log.info("Response generated successfully.")
-            return response[0]['generated_text']
-        except Exception as e:
-            error_msg = f"An error occurred during response generation: {e}"
-            error_log.error(error_msg)
-            raise RuntimeError(error_msg)
\ No newline at end of file
+        # Results arrive in FAISS rank order; walk both sources rank by rank
+        keep_faq, keep_menu = set(), set()
+        for rank in range(max(len(faq_lines), len(menu_lines))):
+            for keep, entry_lengths in ((keep_faq, faq_lengths), (keep_menu, menu_lengths)):
+                if rank < len(entry_lengths) and entry_lengths[rank] <= budget:
+                    keep.add(rank)
+                    budget -= entry_lengths[rank]
+
+        dropped = len(faq_lines) + len(menu_lines) - len(keep_faq) - len(keep_menu)
+        if dropped:
+            pipeline_log.info(f"Left {dropped} retrieved entries out of the prompt to fit {max_context_tokens} tokens.")
+        return ([line for i, line in enumerate(faq_lines) if i in keep_faq],
+                [line for i, line in enumerate(menu_lines) if i in keep_menu])
@@ -4,11 +4,14 @@ Retrieve Results from FAISS Indices.
 
 import os
 import sys
+import threading
 import pandas as pd
 import numpy as np
 import faiss
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Union
 from sentence_transformers import SentenceTransformer
 
 # Get the absolute path to the directory one level above the current file's directory
@@ -18,6 +21,27 @@ sys.path.append(MAIN_DIR)
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
 
+# FAISS releases the GIL while searching, so index_1 is searched on this pool while the
+# calling thread searches index_2.
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="faiss-search")
+
+# The two concurrent searches split the OpenMP threads between them instead of oversubscribing
+SEARCH_OMP_THREADS = max(1, faiss.omp_get_max_threads() // 2)
+
+
+def _search(index: faiss.Index, query_embeddings: np.ndarray, top_k: int):
+    """Searches `index` using this thread's share of the OpenMP threads."""
+    # HNSW and IVF searches parallelize across queries, so a lone query gains nothing from a
+    # thread team and only pays for waking it. The OpenMP thread count is a per-thread
+    # setting, so it is applied in the searching thread and restored afterwards: the same
+    # worker threads also run PyTorch inference, which must keep its own thread count.
+    previous_threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(1 if len(query_embeddings) == 1 else SEARCH_OMP_THREADS)
+    try:
+        return index.search(query_embeddings, top_k)
+    finally:
+        faiss.omp_set_num_threads(previous_threads)
+
 
 class IRetrieve(ABC):
     """
@@ -25,26 +49,13 @@ class IRetrieve(ABC):
     """
 
     @abstractmethod
-    def retrieve(
-        self,
-        query: str,
-        embedding_model: SentenceTransformer,
-        index_1: faiss.IndexFlatL2,
-        index_2: faiss.IndexFlatL2,
-        df_index_1: pd.DataFrame,
-        df_index_2: pd.DataFrame,
-        top_k: int = 3,
-    ) -> Dict[str, Any]:
+    def retrieve(self, query: Union[str, List[str]], top_k: int = 3) -> Dict[str, Any]:
         """
         Abstract method to retrieve results from two FAISS indices.
 
         Args:
-            query (str): The search query.
-            embedding_model (SentenceTransformer): Pretrained embedding model.
-            index_1 (faiss.IndexFlatL2): First FAISS index for retrieval.
-            index_2 (faiss.IndexFlatL2): Second FAISS index for retrieval.
-            df_index_1 (pd.DataFrame): DataFrame corresponding to the first FAISS index.
-            df_index_2 (pd.DataFrame): DataFrame corresponding to the second FAISS index.
+            query (Union[str, List[str]]): The search query, or several phrasings of one query
+                                           (e.g. paraphrases or recent chat turns) searched together.
             top_k (int): Number of top results to retrieve from each index. Default is 3.
 
         Returns:
@@ -55,53 +66,63 @@ class IRetrieve(ABC):
         """
         pass
 
+    @abstractmethod
+    def retrieve_batch(self, queries: List[str], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Abstract method to retrieve results for several queries with one search per index.
+
+        Args:
+            queries (List[str]): The search queries.
+            top_k (int): Number of top results to retrieve from each index. Default is 3.
+
+        Returns:
+            List[Dict[str, Any]]: One result dictionary per query, in query order.
+
+        Raises:
+            ValueError: If inputs are not valid.
+        """
+        pass
+
 
 class Retrieve(IRetrieve):
     """
     Implementation for retrieving results from FAISS indices based on a query.
+
+    The embedding model, indices and their rows are fixed for the lifetime of the instance, so
+    they are validated once here rather than on every query. Query embeddings are kept in an
+    LRU cache keyed on the normalized query text, so repeated questions skip the embedding
+    model entirely. The cache belongs to the instance's model and is never invalidated; using a
+    different model means constructing a new `Retrieve`.
     """
 
-    def retrieve(
+    def __init__(
         self,
-        query: str,
         embedding_model: SentenceTransformer,
-        index_1: faiss.IndexFlatL2,
-        index_2: faiss.IndexFlatL2,
+        index_1: faiss.Index,
+        index_2: faiss.Index,
         df_index_1: pd.DataFrame,
         df_index_2: pd.DataFrame,
-        top_k: int = 3,
-    ) -> Dict[str, Any]:
+        query_cache_size: int = 4096,
+    ):
         """
-        Retrieves results from two FAISS indices based on the query.
-
         Args:
-            query (str): The search query.
             embedding_model (SentenceTransformer): Pretrained embedding model.
-            index_1 (faiss.IndexFlatL2): First FAISS index for retrieval.
-            index_2 (faiss.IndexFlatL2): Second FAISS index for retrieval.
+            index_1 (faiss.Index): First FAISS index for retrieval.
+            index_2 (faiss.Index): Second FAISS index for retrieval.
             df_index_1 (pd.DataFrame): DataFrame corresponding to the first FAISS index.
             df_index_2 (pd.DataFrame): DataFrame corresponding to the second FAISS index.
-            top_k (int): Number of top results to retrieve from each index. Default is 3.
-
-        Returns:
-            Dict[str, Any]: A dictionary containing the query and retrieved results.
+            query_cache_size (int): Number of normalized queries whose embeddings are kept. Default is 4096.
 
         Raises:
-            ValueError: If inputs are not valid or indices encounter errors.
+            ValueError: If inputs are not valid.
         """
-        # Validate input types
-        if not isinstance(query, str):
-            error_msg = "The 'query' must be a string."
-            error_log.error(error_msg)
-            raise ValueError(error_msg)
-
         if not isinstance(embedding_model, SentenceTransformer):
             error_msg = "The 'embedding_model' must be an instance of SentenceTransformer."
             error_log.error(error_msg)
             raise ValueError(error_msg)
 
-        if not isinstance(index_1, faiss.IndexFlatL2) or not isinstance(index_2, faiss.IndexFlatL2):
-            error_msg = "The 'index_1' and 'index_2' must be instances of faiss.IndexFlatL2."
+        if not isinstance(index_1, faiss.Index) or not isinstance(index_2, faiss.Index):
+            error_msg = "The 'index_1' and 'index_2' must be instances of faiss.Index."
             error_log.error(error_msg)
             raise ValueError(error_msg)
 
@@ -110,36 +131,145 @@ class Retrieve(IRetrieve):
             error_log.error(error_msg)
             raise ValueError(error_msg)
 
+        self.embedding_model = embedding_model
+        self.index_1 = index_1
+        self.index_2 = index_2
+        # Rows are materialized once; each query then picks them from plain lists by position
+        self._records_1 = df_index_1.to_dict(orient="records")
+        self._records_2 = df_index_2.to_dict(orient="records")
+
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Batches are retrieved from worker threads
+        self._query_cache_lock = threading.Lock()
+
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Returns the L2-normalized float32 embeddings of `queries`, encoding only those not cached.
+        """
+        # all-MiniLM-L6-v2 is uncased, so case and whitespace do not change the embedding
+        keys = [" ".join(query.lower().split()) for query in queries]
+
+        with self._query_cache_lock:
+            embeddings = {key: self._query_cache[key] for key in keys if key in self._query_cache}
+            for key in embeddings:
+                self._query_cache.move_to_end(key)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in embeddings))
+        if missing:
+            # The indices hold normalized embeddings and rank by inner product (cosine), so the
+            # model normalizes the queries the same way as the indexed rows
+            new_embeddings = self.embedding_model.encode(missing, convert_to_numpy=True,
+                                                         normalize_embeddings=True)
+            # An FP16 (GPU) model returns float16; FAISS only takes float32
+            new_embeddings = new_embeddings.astype(np.float32, copy=False)
+            with self._query_cache_lock:
+                for key, embedding in zip(missing, new_embeddings):
+                    embeddings[key] = embedding
+                    self._query_cache[key] = embedding
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+
+        return np.stack([embeddings[key] for key in keys])
+
+    def retrieve(self, query: Union[str, List[str]], top_k: int = 3) -> Dict[str, Any]:
+        """
+        Retrieves results from two FAISS indices based on the query.
+
+        A list of strings is treated as several phrasings of one query: they are encoded in one
+        batch and their mean embedding is searched once.
+
+        Args:
+            query (Union[str, List[str]]): The search query, or several phrasings of one query
+                                           (e.g. paraphrases or recent chat turns) searched together.
+            top_k (int): Number of top results to retrieve from each index. Default is 3.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the query and retrieved results.
+
+        Raises:
+            ValueError: If inputs are not valid or indices encounter errors.
+        """
+        if isinstance(query, str):
+            return self._retrieve(queries=[query], top_k=top_k)[0]
+
+        if not isinstance(query, list) or not query or not all(isinstance(text, str) for text in query):
+            error_msg = "The 'query' must be a string or a non-empty list of strings."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
+        return self._retrieve(queries=query, top_k=top_k, pooled=True)[0]
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Retrieves results for several queries, encoding them together and searching each index
+        once with the whole (num_queries, embedding_dimension) batch.
+
+        Args:
+            queries (List[str]): The search queries.
+            top_k (int): Number of top results to retrieve from each index. Default is 3.
+
+        Returns:
+            List[Dict[str, Any]]: One result dictionary per query, in query order.
+
+        Raises:
+            ValueError: If inputs are not valid or indices encounter errors.
+        """
+        # Validate input types
+        if not isinstance(queries, list) or not queries or not all(isinstance(query, str) for query in queries):
+            error_msg = "The 'queries' must be a non-empty list of strings."
+            error_log.error(error_msg)
+            raise ValueError(error_msg)
+
+        return self._retrieve(queries=queries, top_k=top_k)
+
+    def _retrieve(self, queries: List[str], top_k: int, pooled: bool = False) -> List[Dict[str, Any]]:
+        """
+        Encodes `queries` in one batch and searches both indices once.
+
+        With `pooled`, the queries' embeddings are averaged into a single search vector and one
+        result dictionary (whose "query" is the list of queries) is returned.
+        """
         if not isinstance(top_k, int) or top_k <= 0:
             error_msg = "The 'top_k' must be a positive integer."
             error_log.error(error_msg)
             raise ValueError(error_msg)
 
-        pipeline_log.info("Starting retrieval process.")
+        pipeline_log.debug("Starting retrieval process for %d queries.", len(queries))
 
         try:
-            # Encode the query into embeddings
-            query_embedding = embedding_model.encode(query).reshape(1, -1)
-            pipeline_log.info(f"Query encoded successfully: {query}")
-
-            # Retrieve from index_1
-            index_1_distances, index_1_indices = index_1.search(query_embedding, top_k)
-            index_1_results = df_index_1.iloc[index_1_indices[0]].to_dict(orient="records")
-            pipeline_log.info(f"Top {top_k} results retrieved from index_1.")
-
-            # Retrieve from index_2
-            index_2_distances, index_2_indices = index_2.search(query_embedding, top_k)
-            index_2_results = df_index_2.iloc[index_2_indices[0]].to_dict(orient="records")
-            pipeline_log.info(f"Top {top_k} results retrieved from index_2.")
-
-            # Combine results into a dictionary
-            results = {
-                "query": query,
-                "_1_result": index_1_results,
-                "_2_result": index_2_results,
-            }
-
-            pipeline_log.info("Retrieval process completed successfully.")
+            # Encode the queries into one (num_queries, embedding_dimension) batch
+            query_embeddings = self._encode_queries(queries)
+            pipeline_log.debug("Queries encoded successfully: %s", queries)
+
+            if pooled:
+                # The mean of unit vectors is shorter than one; renormalize it for cosine ranking
+                query_embeddings = query_embeddings.mean(axis=0, keepdims=True)
+                faiss.normalize_L2(query_embeddings)
+                queries = [queries]
+
+            # FAISS searches a C-contiguous float32 array in place; anything else would be copied
+            # inside each of the two searches (a no-op here for the encoder's output)
+            query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+
+            # Search both indices concurrently, each once for the whole batch
+            index_1_future = _SEARCH_POOL.submit(_search, self.index_1, query_embeddings, top_k)
+            index_2_distances, index_2_indices = _search(self.index_2, query_embeddings, top_k)
+            index_1_distances, index_1_indices = index_1_future.result()
+            pipeline_log.debug("Top %d results retrieved from index_1 and index_2.", top_k)
+
+            records_1, records_2 = self._records_1, self._records_2
+            results = []
+            for query, index_1_row, index_2_row in zip(queries, index_1_indices, index_2_indices):
+                # Approximate indexes pad with -1 when fewer than top_k neighbours are found; the
+                # padding is dropped in NumPy and the ids are unboxed to Python ints in one call
+                results.append({
+                    "query": query,
+                    "_1_result": [records_1[i] for i in index_1_row[index_1_row >= 0].tolist()],
+                    "_2_result": [records_2[i] for i in index_2_row[index_2_row >= 0].tolist()],
+                })
+
+            pipeline_log.debug("Retrieval process completed successfully.")
             return results
 
         except Exception as e:
@@ -160,30 +290,30 @@ if __name__ == "__main__":
     example_df_1 = pd.DataFrame({"data": [f"Sample {i}" for i in range(num_samples)]})
     example_df_2 = pd.DataFrame({"data": [f"Example {i}" for i in range(num_samples)]})
 
-    # Create FAISS indices
-    index_1 = faiss.IndexFlatL2(embedding_dimension)
+    # Create FAISS indices (inner product on L2-normalized embeddings, as in the pipeline)
+    faiss.normalize_L2(example_embeddings_1)
+    index_1 = faiss.IndexFlatIP(embedding_dimension)
     index_1.add(example_embeddings_1)
 
-    index_2 = faiss.IndexFlatL2(embedding_dimension)
+    faiss.normalize_L2(example_embeddings_2)
+    index_2 = faiss.IndexFlatIP(embedding_dimension)
     index_2.add(example_embeddings_2)
 
     # Load a SentenceTransformer model
     embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
 
     # Initialize the Retrieve class
-    retriever = Retrieve()
+    retriever = Retrieve(
+        embedding_model=embedding_model,
+        index_1=index_1,
+        index_2=index_2,
+        df_index_1=example_df_1,
+        df_index_2=example_df_2,
+    )
 
     # Perform retrieval
     try:
-        results = retriever.retrieve(
-            query="Find similar items",
-            embedding_model=embedding_model,
-            index_1=index_1,
-            index_2=index_2,
-            df_index_1=example_df_1,
-            df_index_2=example_df_2,
-            top_k=5,
-        )
+        results = retriever.retrieve(query="Find similar items", top_k=5)
         print("Results:", results)
     except Exception as e:
-        print("An error occurred:", e)
\ No newline at end of file
+        print("An error occurred:", e)
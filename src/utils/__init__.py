@@ -1,32 +1,29 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
-from pathlib import Path
-
-# Get the current directory 
-current_dir = Path(__file__).resolve()
-
-# Search for the main directory
-MAIN_DIR = current_dir
-while MAIN_DIR.name != "Chatbot-Restaurant":
-    MAIN_DIR = MAIN_DIR.parent
-
-# Define the log Directory relative to this file's location
-LOG_DIR = f"{MAIN_DIR}/logs"
-LOG_DIR = os.path.abspath(LOG_DIR)
+from .paths import MAIN_DIR, LOG_DIR
 
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# Log files rotate at 1 MiB, keeping three old files
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
 def setup_logger(name, log_file, level=logging.INFO):
     """Sets up a logger with specified name, log file, and logging level, ensuring no duplicate handlers."""
     logger = logging.getLogger(name)
     
-    # Check if the logger already has handlers
-    if not logger.hasHandlers():
+    # Check the logger's own handlers; hasHandlers() would also see handlers on the root logger
+    if not logger.handlers:
         logger.setLevel(level)
 
-        # Create a file handler for logging
-        file_handler = logging.FileHandler(log_file)
+        # Create a size-capped file handler for logging
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+        )
         file_handler.setLevel(level)
 
         # Create a console handler for logging 
@@ -38,9 +35,19 @@ def setup_logger(name, log_file, level=logging.INFO):
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
 
-        # Add handlers to the logger
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # Callers format each record (QueueHandler.prepare) and enqueue it; a background listener
+        # thread does the file and console writes
+        log_queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        # Flush queued records when the process exits
+        atexit.register(listener.stop)
+
+        # Emit each message once, not again through handlers on the root logger
+        logger.propagate = False
     return logger
 
 # Create loggers
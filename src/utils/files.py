@@ -0,0 +1,27 @@
+"""
+Atomic File Writes for the On-Disk Caches.
+"""
+
+import os
+from typing import Callable
+
+
+def write_atomic(path: str, write: Callable[[str], None]) -> None:
+    """
+    Writes a file so readers only ever see the old or the complete new contents.
+
+    `write` is called with a temporary path next to `path`. Once it returns, the temporary file
+    is renamed over `path`; if it fails, the temporary file is removed.
+
+    Args:
+        path (str): Final path of the file.
+        write (Callable[[str], None]): Writes the file's contents to the path it is given.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
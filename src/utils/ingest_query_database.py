@@ -1,7 +1,10 @@
 import os
 import sys
 import sqlite3
+import threading
 import pandas as pd
+from pathlib import Path
+from typing import Dict
 from sentence_transformers import SentenceTransformer
 from abc import ABC, abstractmethod
 
@@ -12,6 +15,9 @@ sys.path.append(MAIN_DIR)
 # Importing logging utilities (assuming they are implemented in 'utils')
 from utils import pipeline_log, error_log
 
+# Page-cache-backed reads and a 64 MiB page cache for the read-only connections
+READ_PRAGMAS = ("PRAGMA mmap_size=268435456", "PRAGMA cache_size=-65536")
+
 class IIngestQueryDatabase(ABC):
     """
     Abstract base class for ingesting data from a database using SQL queries.
@@ -42,8 +48,34 @@ class IngestQueryDatabase(IIngestQueryDatabase):
     """
     Concrete class for ingesting data from an SQLite database.
     Implements the `ingest` method to execute SQL queries and return results as DataFrames.
+
+    One read-only connection is opened per database file and reused by later `ingest` calls.
     """
 
+    def __init__(self):
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, db_path: str) -> sqlite3.Connection:
+        """Returns the shared read-only connection to `db_path`, opening it on first use."""
+        key = os.path.abspath(db_path)
+        conn = self._connections.get(key)
+        if conn is None:
+            pipeline_log.info(f"Connecting to the SQLite database at {db_path}...")
+            # The chatbot only reads its database; WAL is not set because it needs write access
+            conn = sqlite3.connect(f"{Path(key).as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            for pragma in READ_PRAGMAS:
+                conn.execute(pragma)
+            self._connections[key] = conn
+        return conn
+
+    def close(self) -> None:
+        """Closes every connection opened by this instance."""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
     def ingest(self, db_path: str, query: str) -> pd.DataFrame:
         """
         Executes a SQL query on the provided SQLite database and returns the result as a pandas DataFrame.
@@ -56,7 +88,7 @@ class IngestQueryDatabase(IIngestQueryDatabase):
             pd.DataFrame: The result of the SQL query as a pandas DataFrame.
 
         Raises:
-            ValueError: If the `db_path` or `query` are invalid.
+            ValueError: If the `db_path` or `query` are invalid, or the query returns no result set.
             FileNotFoundError: If the SQLite database file does not exist.
             sqlite3.Error: If there is a database-related error during query execution.
         """
@@ -77,22 +109,31 @@ class IngestQueryDatabase(IIngestQueryDatabase):
             raise FileNotFoundError(error_msg)
 
         try:
-            # Connect to the SQLite database
-            pipeline_log.info(f"Connecting to the SQLite database at {db_path}...")
-            conn = sqlite3.connect(db_path)
-
-            # Execute the query and load the result into a pandas DataFrame
+            # Execute the query on the shared connection and build the DataFrame from its rows
             pipeline_log.info(f"Executing query: {query}")
-            table_df = pd.read_sql_query(query, conn)
-
-            # Close the database connection
-            conn.close()
-            pipeline_log.info("Query executed successfully and database connection closed.")
+            with self._lock:
+                cursor = self._connect(db_path).execute(query)
+                if cursor.description is None:
+                    error_msg = "The 'query' must return a result set (e.g. a SELECT statement)."
+                    error_log.error(error_msg)
+                    raise ValueError(error_msg)
+                rows = cursor.fetchall()
+                columns = [description[0] for description in cursor.description]
+            # Build the DataFrame column by column (positionally, as names may repeat in joins),
+            # so each column's dtype is inferred from its own values without a row-wise object array
+            if rows:
+                table_df = pd.DataFrame({position: list(values) for position, values in enumerate(zip(*rows))})
+                table_df.columns = columns
+            else:
+                table_df = pd.DataFrame(columns=columns)
+            pipeline_log.info("Query executed successfully.")
 
             # Log the successful ingestion
             pipeline_log.info(f"Data ingested successfully from {db_path} with query: {query[:50]}...")  # Log first 50 chars of query for brevity
             return table_df
 
+        except ValueError:
+            raise
         except sqlite3.Error as e:
             # Log and raise database-related errors
             error_msg = f"SQLite error occurred: {str(e)}"
@@ -0,0 +1,25 @@
+"""
+Project Paths Shared by the Application and Tests.
+"""
+
+import functools
+from pathlib import Path
+
+
+@functools.cache
+def project_root() -> Path:
+    """
+    Returns the project's root directory (the one holding `src/`, `configs/` and `logs/`).
+
+    The location is derived from this file, so it does not depend on the name of the checkout
+    directory, and it is computed once per process.
+
+    Returns:
+        Path: Absolute path to the project root.
+    """
+    # src/utils/paths.py -> src/utils -> src -> project root
+    return Path(__file__).resolve().parents[2]
+
+
+MAIN_DIR = project_root()
+LOG_DIR = MAIN_DIR / "logs"
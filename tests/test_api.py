@@ -1,34 +1,69 @@
-import sys
 import pytest
 from fastapi.testclient import TestClient
 
-from pathlib import Path
-
-# Dynamically locate the main project directory
-current_dir = Path(__file__).resolve().parent
-MAIN_DIR = current_dir
-while MAIN_DIR.name != "Chatbot-Restaurant":
-    MAIN_DIR = MAIN_DIR.parent
-
-# Add the `src` directory to sys.path
-sys.path.append(str(MAIN_DIR))
-
 # Import the app
+import src.api.app as app_module
 from src.api.app import app  
 
-# Create a TestClient instance
-client = TestClient(app)
+# Create a TestClient instance; entering it runs the app's lifespan (model loading)
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
 
 # Test root route (GET request)
-def test_get_form():
+def test_get_form(client):
     response = client.get("/")
     assert response.status_code == 200
     assert "form" in response.text  # Assuming your template renders a form
 
 # Test /chat route (POST request)
-def test_chat():
+def test_chat(client):
     query = "What is the menu?"
     response = client.post("/chat", data={"query": query})
     
     assert response.status_code == 200
     assert "response" in response.text  # Assuming 'response' is part of the response template
+
+@pytest.fixture
+def stub_main(client, monkeypatch):
+    """Replaces the model pipeline behind /chat with a stub that records its queries."""
+    calls = []
+
+    async def main(query):
+        calls.append(query)
+        if query == "fail":
+            raise RuntimeError("generation failed")
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(app_module, "main", main)
+    monkeypatch.setattr(app_module.CONFIGRATION, "response_cache_size", 2)
+    client.app.state.response_cache.clear()
+    yield calls
+    client.app.state.response_cache.clear()
+
+# Test that the response cache ignores case and whitespace differences
+def test_chat_cache_normalized_hit(client, stub_main):
+    first = client.post("/chat", data={"query": "What is the Menu?"})
+    second = client.post("/chat", data={"query": "  what is   the menu? "})
+
+    assert stub_main == ["What is the Menu?"]
+    assert "answer 1" in first.text and "answer 1" in second.text
+
+# Test that the least recently used response is evicted at response_cache_size
+def test_chat_cache_eviction(client, stub_main):
+    for query in ["tea", "coffee", "tea", "juice", "coffee"]:
+        client.post("/chat", data={"query": query})
+
+    # "coffee" was evicted when "juice" was added; "tea" was used more recently
+    assert stub_main == ["tea", "coffee", "juice", "coffee"]
+
+# Test that a failed query is not cached
+def test_chat_cache_skips_errors(client, stub_main):
+    with pytest.raises(RuntimeError):
+        client.post("/chat", data={"query": "fail"})
+    with pytest.raises(RuntimeError):
+        client.post("/chat", data={"query": "fail"})
+
+    assert stub_main == ["fail", "fail"]
+    assert "fail" not in client.app.state.response_cache
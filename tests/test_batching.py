@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+
+from src.rag.batching import GenerationBatcher, RetrievalBatcher
+
+
+class StubRetriever:
+    """Stands in for `Retrieve`, recording each batch it is asked to search."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+
+    def retrieve_batch(self, queries, top_k=3):
+        self.batches.append(list(queries))
+        if self.error is not None:
+            raise self.error
+        return [{"query": query, "top_k": top_k} for query in queries]
+
+
+class StubGenerator:
+    """Stands in for `GenerateResponse`, answering each query with a fixed transformation."""
+
+    def __init__(self):
+        self.batches = []
+
+    def generate_batch(self, queries, retrievers, generate_model, **kwargs):
+        self.batches.append(list(queries))
+        return [f"answer to {retriever['query']}" for retriever in retrievers]
+
+
+async def run_batcher(batcher, scenario):
+    """Runs `scenario(batcher)` with the batcher's background task started, then stops it."""
+    batcher.start()
+    try:
+        return await scenario(batcher)
+    finally:
+        await batcher.stop()
+
+
+def test_retrieval_batcher_returns_results_in_order():
+    """Test that concurrent submits are searched together and each gets its own result."""
+    retriever = StubRetriever()
+    batcher = RetrievalBatcher(retriever=retriever, top_k=5, max_batch_size=8, max_wait_ms=50)
+    queries = [f"query {i}" for i in range(5)]
+
+    async def scenario(batcher):
+        return await asyncio.gather(*(batcher.submit(query) for query in queries))
+
+    results = asyncio.run(run_batcher(batcher, scenario))
+
+    assert [result["query"] for result in results] == queries
+    assert all(result["top_k"] == 5 for result in results)
+    assert retriever.batches == [queries]
+
+
+def test_generation_batcher_returns_results_in_order():
+    """Test that concurrent generation requests each get the response for their own query."""
+    batcher = GenerationBatcher(generate_model=None, generation_kwargs={}, max_batch_size=8, max_wait_ms=50)
+    batcher.generator = StubGenerator()
+    queries = [f"query {i}" for i in range(3)]
+
+    async def scenario(batcher):
+        return await asyncio.gather(*(batcher.submit(query, {"query": query}) for query in queries))
+
+    responses = asyncio.run(run_batcher(batcher, scenario))
+
+    assert responses == [f"answer to {query}" for query in queries]
+    assert batcher.generator.batches == [queries]
+
+
+def test_batcher_propagates_errors_to_every_request():
+    """Test that an exception raised while serving a batch reaches every request in it."""
+    error = RuntimeError("search failed")
+    batcher = RetrievalBatcher(retriever=StubRetriever(error=error), max_batch_size=8, max_wait_ms=50)
+
+    async def scenario(batcher):
+        return await asyncio.gather(*(batcher.submit(f"query {i}") for i in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run_batcher(batcher, scenario))
+
+    assert results == [error, error, error]
+
+
+def test_batcher_skips_cancelled_requests():
+    """Test that a request cancelled while queued is left out of the batch."""
+    retriever = StubRetriever()
+    batcher = RetrievalBatcher(retriever=retriever, max_batch_size=8, max_wait_ms=50)
+
+    async def scenario(batcher):
+        cancelled = asyncio.create_task(batcher.submit("cancelled query"))
+        kept = asyncio.create_task(batcher.submit("kept query"))
+        # Let both requests reach the queue, then cancel one before the batch is served
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await kept
+
+    result = asyncio.run(run_batcher(batcher, scenario))
+
+    assert result["query"] == "kept query"
+    assert retriever.batches == [["kept query"]]
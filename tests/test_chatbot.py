@@ -1,17 +1,7 @@
-import sys
 import pytest
+import pandas as pd
 from fastapi.testclient import TestClient
 import time
-from pathlib import Path
-
-# Dynamically locate the main project directory
-current_dir = Path(__file__).resolve().parent
-MAIN_DIR = current_dir
-while MAIN_DIR.name != "Chatbot-Restaurant":
-    MAIN_DIR = MAIN_DIR.parent
-
-# Add the `src` directory to sys.path
-sys.path.append(str(MAIN_DIR))
 
 # Assuming app is your FastAPI instance
 from src.api.app import app  
@@ -27,11 +17,16 @@ from src.rag.respons_generation import GenerateResponse
 from src.config import Config
 
 
-# Initialize TestClient
-client = TestClient(app)
 CONFIGRATION = Config(None)
 
 
+@pytest.fixture(scope="module")
+def client():
+    """Fixture returning a TestClient with the app's lifespan (model loading) running."""
+    with TestClient(app) as client:
+        yield client
+
+
 @pytest.fixture(scope="module")
 def ingest_data():
     """Fixture to set up and return processed data."""
@@ -62,9 +57,29 @@ def ingest_data():
         'FAQsDF_c': FAQsDF_c,
         'MENUITEMsDF_c': MENUITEMsDF_c,
         'embedding_model': EMBEDDINGMODEL,
+        'retriever': Retrieve(embedding_model=EMBEDDINGMODEL,
+                              index_1=FAQsIndex,
+                              index_2=MENUITEMsIndex,
+                              df_index_1=FAQsDF_c,
+                              df_index_2=MENUITEMsDF_c),
         'flan_model': FlanT5Load().load()
     }
 
+def test_combined_missing_column():
+    """Test that combining raises when a configured column is missing from the table."""
+    columns = CONFIGRATION.columns_faqs
+    df = pd.DataFrame({column: ["value"] for column in columns[1:]})
+
+    with pytest.raises(ValueError, match="Missing columns"):
+        CombinedTables().combined(columns=columns, df=df)
+
+def test_combined_empty_columns():
+    """Test that combining raises when no columns are given."""
+    df = pd.DataFrame({column: ["value"] for column in CONFIGRATION.columns_faqs})
+
+    with pytest.raises(ValueError, match="at least one column"):
+        CombinedTables().combined(columns=[], df=df)
+
 def test_ingest_data(ingest_data):
     """Test data ingestion."""
     assert len(ingest_data['FAQsDF_c']) > 0
@@ -92,26 +107,23 @@ def test_embedding_generation(ingest_data):
 def test_retrieval(ingest_data):
     """Test data retrieval using the FAISS index."""
     query = "What is the menu?"
-    retriever = Retrieve().retrieve(query=query,
-                                     embedding_model=ingest_data['embedding_model'],
-                                     index_1=ingest_data['FAQsIndex'],
-                                     index_2=ingest_data['MENUITEMsIndex'],
-                                     df_index_1=ingest_data['FAQsDF_c'],
-                                     df_index_2=ingest_data['MENUITEMsDF_c'],
-                                     top_k=5)
+    retriever = ingest_data['retriever'].retrieve(query=query, top_k=5)
     
     assert len(retriever) > 0
 
+def test_retrieval_pooled_queries(ingest_data):
+    """Test that several phrasings of one query are searched together as one query."""
+    queries = ["What is the menu?", "Which dishes do you serve?"]
+    retriever = ingest_data['retriever'].retrieve(query=queries, top_k=5)
+
+    assert retriever["query"] == queries
+    assert 0 < len(retriever["_1_result"]) <= 5
+    assert 0 < len(retriever["_2_result"]) <= 5
+
 def test_generate_response(ingest_data):
     """Test the response generation."""
     query = "What is the menu?"
-    retriever = Retrieve().retrieve(query=query,
-                                     embedding_model=ingest_data['embedding_model'],
-                                     index_1=ingest_data['FAQsIndex'],
-                                     index_2=ingest_data['MENUITEMsIndex'],
-                                     df_index_1=ingest_data['FAQsDF_c'],
-                                     df_index_2=ingest_data['MENUITEMsDF_c'],
-                                     top_k=5)
+    retriever = ingest_data['retriever'].retrieve(query=query, top_k=5)
     
     response = GenerateResponse().generate(query=query,
                                            retriever=retriever,
@@ -124,7 +136,51 @@ def test_generate_response(ingest_data):
     assert response is not None
     assert isinstance(response, str)
 
-def test_chatbot_response():
+def test_generate_response_batch(ingest_data):
+    """Test batched response generation returns one response per query, in order."""
+    queries = ["What is the menu?", "Do you have vegetarian dishes?"]
+    retrievers = [ingest_data['retriever'].retrieve(query=query, top_k=5)
+                  for query in queries]
+
+    responses = GenerateResponse().generate_batch(queries=queries,
+                                                  retrievers=retrievers,
+                                                  generate_model=ingest_data['flan_model'],
+                                                  max_length=CONFIGRATION.max_length,
+                                                  do_sample=CONFIGRATION.do_sample,
+                                                  temperature=CONFIGRATION.temperature,
+                                                  top_p=CONFIGRATION.top_p,
+                                                  top_k=CONFIGRATION.top_k)
+    assert len(responses) == len(queries)
+    assert all(isinstance(response, str) for response in responses)
+
+def test_build_context_token_budget(ingest_data):
+    """Test that the prompt is cut down to the token budget while keeping the query."""
+    query = "What is the menu?"
+    retriever = ingest_data['retriever'].retrieve(query=query, top_k=10)
+    tokenizer = ingest_data['flan_model'].tokenizer
+
+    full_context = GenerateResponse().build_context(query=query, retriever=retriever)
+    context = GenerateResponse().build_context(query=query, retriever=retriever,
+                                               tokenizer=tokenizer, max_context_tokens=128)
+
+    assert len(context) < len(full_context)
+    assert len(tokenizer(context)["input_ids"]) <= 128
+    assert context.endswith(f"User Query: {query}\n\n")
+
+def test_build_context_budget_below_fixed_prompt(ingest_data):
+    """Test that a budget smaller than the fixed prompt keeps no retrieved entries but still keeps the query."""
+    query = "What is the menu?"
+    retriever = ingest_data['retriever'].retrieve(query=query, top_k=10)
+    tokenizer = ingest_data['flan_model'].tokenizer
+
+    context = GenerateResponse().build_context(query=query, retriever=retriever,
+                                               tokenizer=tokenizer, max_context_tokens=8)
+    empty_context = GenerateResponse().build_context(query=query, retriever={'_1_result': [], '_2_result': []})
+
+    assert context == empty_context
+    assert context.endswith(f"User Query: {query}\n\n")
+
+def test_chatbot_response(client):
     """Test the /chat endpoint."""
     query = "What is the menu?"
     response = client.post("/chat", data={"query": query})
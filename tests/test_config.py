@@ -0,0 +1,42 @@
+import pytest
+
+import src.config as config_module
+from src.config import config_yaml_reader
+
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    """The reader caches its result; every test starts and ends with an empty cache."""
+    config_yaml_reader.cache_clear()
+    yield
+    config_yaml_reader.cache_clear()
+
+
+def test_config_reader_skips_non_yaml_files(tmp_path, monkeypatch):
+    """Test that the first YAML file in the config directory is used, not the first file."""
+    (tmp_path / "a_notes.txt").write_text("not: [valid yaml")
+    (tmp_path / "b_config.yaml").write_text("source: directory\n")
+    monkeypatch.setattr(config_module, "CONFIG_DIR", str(tmp_path))
+
+    assert config_yaml_reader() == {"source": "directory"}
+
+
+def test_config_reader_honours_explicit_path(tmp_path, monkeypatch):
+    """Test that an explicit file path is read instead of the config directory's YAML."""
+    config_dir = tmp_path / "configs"
+    config_dir.mkdir()
+    (config_dir / "config.yaml").write_text("source: directory\n")
+    explicit = tmp_path / "explicit.yaml"
+    explicit.write_text("source: explicit\n")
+    monkeypatch.setattr(config_module, "CONFIG_DIR", str(config_dir))
+
+    assert config_yaml_reader(str(explicit)) == {"source": "explicit"}
+
+
+def test_config_reader_raises_without_yaml(tmp_path, monkeypatch):
+    """Test that a config directory without YAML files raises FileNotFoundError."""
+    (tmp_path / "notes.txt").write_text("no configuration here")
+    monkeypatch.setattr(config_module, "CONFIG_DIR", str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        config_yaml_reader()
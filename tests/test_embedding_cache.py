@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from sentence_transformers import SentenceTransformer
+
+from src.preprocess.apply_embedding_combined import EmbeddingForCombined
+from src.utils.files import write_atomic
+
+
+def stub_embedding(text):
+    """Deterministic embedding of a text, distinct for every text used below."""
+    return np.array([len(text), sum(map(ord, text)) % 97, 1.0], dtype=np.float32)
+
+
+class StubModel(SentenceTransformer):
+    """SentenceTransformer stand-in that records every text it is asked to encode."""
+
+    def __init__(self):
+        # Only nn.Module's bookkeeping is needed; no model is loaded
+        torch.nn.Module.__init__(self)
+        self.encoded = []
+
+    def encode(self, sentences, **kwargs):
+        self.encoded.append(list(sentences))
+        return np.stack([stub_embedding(text) for text in sentences])
+
+
+def embed(model, texts, cache_dir):
+    df = pd.DataFrame({"combined": texts})
+    return EmbeddingForCombined().embedded(embedding_model=model, df=df, device="cpu", cache_dir=str(cache_dir))
+
+
+def test_embedding_cache_full_hit(tmp_path):
+    """Test that texts already in the cache are not encoded again."""
+    model = StubModel()
+    texts = ["garlic bread", "Do you deliver?", "tea"]
+
+    first = embed(model, texts, tmp_path)
+    second = embed(model, texts, tmp_path)
+
+    assert len(model.encoded) == 1
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(second, np.stack([stub_embedding(text) for text in texts]))
+
+
+def test_embedding_cache_partial_hit(tmp_path):
+    """Test that only uncached texts are encoded and rows come back in input order."""
+    model = StubModel()
+    embed(model, ["garlic bread", "tea"], tmp_path)
+
+    texts = ["Do you deliver?", "tea", "lamb kabsa", "garlic bread"]
+    result = embed(model, texts, tmp_path)
+
+    assert sorted(model.encoded[-1]) == sorted(["Do you deliver?", "lamb kabsa"])
+    np.testing.assert_array_equal(result, np.stack([stub_embedding(text) for text in texts]))
+
+    # The new rows were merged into the existing shards, not written over them
+    model.encoded.clear()
+    embed(model, texts, tmp_path)
+    assert model.encoded == []
+
+
+def test_embedding_cache_leaves_no_temporary_files(tmp_path):
+    """Test that shard writes replace their files without leaving temporary files behind."""
+    embed(StubModel(), ["garlic bread", "Do you deliver?", "tea"], tmp_path)
+
+    assert list(tmp_path.glob("shard-*.npz"))
+    assert not list(tmp_path.glob("*.tmp-*"))
+
+
+def test_write_atomic_keeps_old_file_on_failure(tmp_path):
+    """Test that a failed write leaves the previous file intact and removes the temporary file."""
+    path = tmp_path / "data.txt"
+    path.write_text("old")
+
+    def failing_write(tmp):
+        with open(tmp, "w") as f:
+            f.write("partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        write_atomic(str(path), failing_write)
+
+    assert path.read_text() == "old"
+    assert not list(tmp_path.glob("*.tmp-*"))
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.utils.ingest_query_database import IngestQueryDatabase
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A small SQLite database with integer, real, text and nullable columns."""
+    path = tmp_path / "restaurant.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER, name TEXT, price REAL, calories INTEGER, allergens TEXT)")
+    conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?)", [
+        (1, "Kabsa", 45.0, 650, None),
+        (2, "Hummus", 18.5, None, "sesame"),
+        (3, "Tea", 5.0, 2, None),
+    ])
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM items",
+    "SELECT id, name, id FROM items",
+    "SELECT * FROM items WHERE id > 100",
+])
+def test_ingest_matches_read_sql_query(db_path, query):
+    """Test that ingest returns the same columns, dtypes and values as pd.read_sql_query."""
+    with sqlite3.connect(db_path) as conn:
+        expected = pd.read_sql_query(query, conn)
+
+    result = IngestQueryDatabase().ingest(db_path=db_path, query=query)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_ingest_reuses_connection(db_path):
+    """Test that repeated queries on one database share a single connection."""
+    ingest = IngestQueryDatabase()
+    ingest.ingest(db_path=db_path, query="SELECT * FROM items")
+    ingest.ingest(db_path=db_path, query="SELECT name FROM items")
+
+    assert len(ingest._connections) == 1
+    ingest.close()
+    assert ingest._connections == {}
+
+
+def test_ingest_rejects_statement_without_result_set(db_path):
+    """Test that a statement returning no result set raises ValueError."""
+    with pytest.raises(ValueError):
+        IngestQueryDatabase().ingest(db_path=db_path, query="PRAGMA cache_size = -2000")
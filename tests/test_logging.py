@@ -1,25 +1,16 @@
-import sys
 import os
 from unittest import mock
-from pathlib import Path
 import pytest
 
-# Dynamically locate the main project directory
-current_dir = Path(__file__).resolve().parent
-MAIN_DIR = current_dir
-while MAIN_DIR.name != "Chatbot-Restaurant":
-    MAIN_DIR = MAIN_DIR.parent
-
-# Add the `src` directory to sys.path
-sys.path.append(str(MAIN_DIR))
-print("Maind Dir" + str(MAIN_DIR))
+# The project root, located once for every module
+from src.utils.paths import MAIN_DIR, LOG_DIR
 from src.utils import chatbot_log, error_log, pipeline_log
 
 # Test for logging setup
 def test_logging_setup():
     """Test if the log directory and files are properly set up."""
     # Define the log directory path
-    log_dir = str(MAIN_DIR) + "/logs"
+    log_dir = str(LOG_DIR)
     # Ensure the log directory exists
     assert os.path.exists(log_dir),  f"Log directory {log_dir} does not exist."
 
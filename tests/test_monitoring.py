@@ -0,0 +1,67 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import monitoring.api_logs as api_logs
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Points the dashboard at an empty log directory with an empty tail cache."""
+    monkeypatch.setattr(api_logs, "LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(api_logs, "_LOG_CACHE", {})
+    return tmp_path
+
+
+def test_read_log_tail_drops_partial_first_line(tmp_path):
+    """Test that a tail cut mid-line starts at the next full line."""
+    path = tmp_path / "app.log"
+    path.write_bytes(b"first line\nsecond line\nthird line\n")
+    size = path.stat().st_size
+
+    # 15 bytes start inside "second line"
+    assert api_logs.read_log_tail(str(path), size, 15) == "third line\n"
+    # A tail covering the whole file keeps the first line
+    assert api_logs.read_log_tail(str(path), size, size) == "first line\nsecond line\nthird line\n"
+
+
+def test_log_cache_reused_until_file_changes(log_dir, monkeypatch):
+    """Test that an unchanged log is served from the cache and a changed size re-reads it."""
+    reads = []
+    read_log_tail = api_logs.read_log_tail
+    monkeypatch.setattr(api_logs, "read_log_tail", lambda *args: reads.append(args) or read_log_tail(*args))
+    path = log_dir / "pipeline_log.log"
+    path.write_text("started\n")
+
+    assert api_logs.get_all_logs() == {"pipeline_log.log": "started\n"}
+    assert api_logs.get_all_logs() == {"pipeline_log.log": "started\n"}
+    assert len(reads) == 1
+
+    with open(path, "a") as file:
+        file.write("finished\n")
+
+    assert api_logs.get_all_logs() == {"pipeline_log.log": "started\nfinished\n"}
+    assert len(reads) == 2
+
+
+def test_log_cache_invalidated_on_mtime_change(log_dir):
+    """Test that a rewrite keeping the same size is picked up through its new mtime."""
+    path = log_dir / "error.log"
+    path.write_text("error A\n")
+    os.utime(path, (1_000_000, 1_000_000))
+    assert api_logs.get_all_logs() == {"error.log": "error A\n"}
+
+    path.write_text("error B\n")
+    os.utime(path, (2_000_000, 2_000_000))
+
+    assert api_logs.get_all_logs() == {"error.log": "error B\n"}
+
+
+def test_api_logs_caps_tail(log_dir):
+    """Test that the endpoint rejects a tail larger than LOG_TAIL_MAX_BYTES."""
+    (log_dir / "error.log").write_text("error A\n")
+    client = TestClient(api_logs.app)
+
+    assert client.get("/api/logs", params={"tail": api_logs.LOG_TAIL_MAX_BYTES}).status_code == 200
+    assert client.get("/api/logs", params={"tail": api_logs.LOG_TAIL_MAX_BYTES + 1}).status_code == 422
@@ -0,0 +1,71 @@
+import faiss
+import numpy as np
+import pandas as pd
+import torch
+from sentence_transformers import SentenceTransformer
+
+from src.rag.retrieval import Retrieve
+
+EMBEDDING_DIMENSION = 8
+
+
+class CountingEncoder(SentenceTransformer):
+    """SentenceTransformer stand-in that records every batch of queries it encodes."""
+
+    def __init__(self):
+        # Only nn.Module's bookkeeping is needed; no model is loaded
+        torch.nn.Module.__init__(self)
+        self.encoded = []
+
+    def encode(self, sentences, **kwargs):
+        self.encoded.append(list(sentences))
+        embeddings = np.stack([np.random.default_rng(sum(map(ord, text))).random(EMBEDDING_DIMENSION)
+                               for text in sentences]).astype(np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings
+
+
+def make_retriever(query_cache_size=4096):
+    encoder = CountingEncoder()
+    rows = np.random.default_rng(0).random((10, EMBEDDING_DIMENSION)).astype(np.float32)
+    faiss.normalize_L2(rows)
+    index = faiss.IndexFlatIP(EMBEDDING_DIMENSION)
+    index.add(rows)
+    df = pd.DataFrame({"data": [f"row {i}" for i in range(10)]})
+    retriever = Retrieve(embedding_model=encoder, index_1=index, index_2=index,
+                         df_index_1=df, df_index_2=df, query_cache_size=query_cache_size)
+    return retriever, encoder
+
+
+def test_query_cache_normalizes_case_and_whitespace():
+    """Test that queries differing only in case and whitespace share one cached embedding."""
+    retriever, encoder = make_retriever()
+
+    first = retriever.retrieve("What is the Menu?", top_k=3)
+    second = retriever.retrieve("  what is   the menu? ", top_k=3)
+
+    assert encoder.encoded == [["what is the menu?"]]
+    assert first["_1_result"] == second["_1_result"]
+
+
+def test_query_cache_encodes_only_misses():
+    """Test that a batch encodes each uncached query once and reuses cached ones."""
+    retriever, encoder = make_retriever()
+    retriever.retrieve("tea", top_k=3)
+
+    retriever.retrieve_batch(["coffee", "tea", "Coffee", "juice"], top_k=3)
+
+    assert encoder.encoded == [["tea"], ["coffee", "juice"]]
+
+
+def test_query_cache_evicts_least_recently_used():
+    """Test that the cache keeps at most `query_cache_size` queries, evicting the oldest first."""
+    retriever, encoder = make_retriever(query_cache_size=2)
+
+    for query in ["tea", "coffee", "tea", "juice"]:
+        retriever.retrieve(query, top_k=3)
+    # "coffee" was the least recently used when "juice" was added
+    retriever.retrieve("tea", top_k=3)
+    retriever.retrieve("coffee", top_k=3)
+
+    assert encoder.encoded == [["tea"], ["coffee"], ["juice"], ["coffee"]]